@@ -1,14 +1,34 @@
+import os
+import re
+import json
+import time
+from collections import Counter, defaultdict
 from typing import Literal
 from typing_extensions import TypedDict
 
-from langchain_ollama import ChatOllama
+from langchain_core.messages import AIMessage, HumanMessage
 from langgraph.graph import MessagesState, END
 from langgraph.types import Command
 from config import load_yaml_config
 from agents_config import members
+from utils.tracing import instrument_llm, traced_node, get_current_span
+from utils.prefetch import get_digest
+from utils.ollama_models import create_chat_model
+from utils.llm_scheduler import schedule_llm
 
 config = load_yaml_config()
 
+# "structured": LangChain with_structured_output.
+# "constrained": Ollama JSON-schema format constraint with a token budget and local repair.
+SUPERVISOR_ROUTING_MODE = os.getenv("SUPERVISOR_ROUTING_MODE", "structured").strip().lower()
+ROUTING_MODES = ("structured", "constrained")
+# Routing calls in constrained mode stop after this many tokens. Answers from the digest go in
+# message_completion_summary, so leave room for them.
+ROUTING_MAX_TOKENS = int(os.getenv("ROUTING_MAX_TOKENS", "1024"))
+# Extra generations when the constrained output cannot be repaired.
+ROUTING_MAX_RETRIES = int(os.getenv("ROUTING_MAX_RETRIES", "1"))
+SUPERVISOR_MODEL = "deepseek-r1:7b"
+
 agent_members_prompt = []
 
 for agent_key, agent_data in config["agents"].items():
@@ -29,7 +49,7 @@ for agent_key, agent_data in config["agents"].items():
 agent_members_prompt_final = "\n".join(agent_members_prompt)
 
 # # Create LLM instance (or import from shared config)
-supervisor_llm = ChatOllama(model ="deepseek-r1:7b")
+supervisor_llm = instrument_llm(schedule_llm(create_chat_model("supervisor", SUPERVISOR_MODEL), "supervisor"))
 
 class State(MessagesState):
     next: str
@@ -70,15 +90,232 @@ When delegating a list of meals to be added to the calendar it should look like
 ### Dinner Meal Plan\n\n**February 26 (Monday)**: \n- **Bonus veggie stew**  \n  - Ingredients: Carrots, potatoes, celery, onion, garlic, canned tomatoes, kidney beans, chickpeas, vegetable stock, bay leaves, thyme, olive oil\n\n**February 27 (Tuesday)**: \n- **Kikärtsgyros**  \n  - Ingredients: Chickpeas, red onion, garlic, cumin, smoked paprika, yogurt, cucumber, tomato, pita bread\n\n**February 28 (Wednesday)**: \n- **Italian bean soup**  \n  - Ingredients: White beans, canned tomatoes, onion, garlic, carrot, celery, vegetable stock, rosemary, Parmesan cheese\n,please add these to the family calendar.
 """
 
-def supervisor_node(state: State) -> Command[Literal[*members, "__end__"]]:
-    # Combine the supervisor system prompt with the conversation history.
-    messages = [{"role": "system", "content": supervisor_system_prompt}] + state["messages"]
-    response = supervisor_llm.with_structured_output(SupervisorOutput).invoke(messages)
-    goto = response["next"]
+digest_prompt = """
+# Precomputed digest
+The following digest of upcoming calendar events and unread emails was prefetched in the background:
+{digest}
+If the user's request can be answered completely from this digest (e.g. summarizing the week or the inbox), respond with next = FINISH and put the full answer in message_completion_summary instead of delegating.
+"""
+
+# Compact schema for Ollama's format constraint: no descriptions, only what routing needs.
+ROUTING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "next": {"enum": [*members, "FINISH"]},
+        "task_description_for_agent": {"type": "string"},
+        "message_completion_summary": {"type": "string"},
+    },
+    "required": ["next", "task_description_for_agent", "message_completion_summary"],
+}
+
+routing_format_prompt = f"""
+Respond only with a JSON object with the keys "next" (one of {[*members, "FINISH"]}), "task_description_for_agent" and "message_completion_summary". Do not explain your reasoning.
+"""
+
+# Decoding is constrained to ROUTING_SCHEMA, so deepseek-r1 cannot open a <think> section.
+constrained_supervisor_llm = instrument_llm(schedule_llm(
+    create_chat_model("supervisor", SUPERVISOR_MODEL, format=ROUTING_SCHEMA, num_predict=ROUTING_MAX_TOKENS, temperature=0),
+    "supervisor",
+))
+
+# Per routing mode: calls, failures, repaired outputs, retries and total latency.
+ROUTING_METRICS = defaultdict(Counter)
+
+_THINK_RE = re.compile(r"<think>.*?(?:</think>|$)", re.DOTALL)
+
+
+def _close_json(text: str) -> tuple:
+    """
+    Close the string, arrays and objects left open by a truncated JSON document.
+
+    Returns:
+        tuple: (closed_text, cut_value) where cut_value tells whether the last value was cut
+        off (an open string, or a key without a value), so its content is not what the model meant.
+    """
+    closers = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+    cut_value = in_string
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        text += '""'
+        cut_value = True
+    return text + "".join(reversed(closers)), cut_value
+
+
+def parse_routing_output(text: str) -> tuple:
+    """
+    Parse a routing answer, repairing the usual defects of small reasoning models: <think>
+    sections, code fences or prose around the JSON, and JSON cut off by the token budget after
+    its last value. Output cut off inside a value, or before all required keys, is rejected so
+    the router retries instead of delegating a truncated task description, and so is a
+    delegation without a task description.
+
+    Returns:
+        tuple: (route, repaired) where route is a SupervisorOutput dict, or None when the
+        output cannot be used, and repaired tells whether any repair was needed.
+    """
+    stripped = _THINK_RE.sub("", text or "").strip()
+    start = stripped.find("{")
+    if start == -1:
+        return None, True
+    candidate = stripped[start:]
+    repaired = stripped != (text or "").strip() or start > 0
+    try:
+        data, end = json.JSONDecoder().raw_decode(candidate)
+        repaired = repaired or bool(candidate[end:].strip())
+    except json.JSONDecodeError:
+        closed, cut_value = _close_json(candidate)
+        if cut_value:
+            return None, True
+        try:
+            data = json.loads(closed)
+        except json.JSONDecodeError:
+            return None, True
+        if not isinstance(data, dict) or any(key not in data for key in ROUTING_SCHEMA["required"]):
+            return None, True
+        repaired = True
+    if not isinstance(data, dict):
+        return None, True
+
+    # Accept "finish" or "calendar" for "FINISH" and "calendar_agent".
+    targets = {name.lower(): name for name in [*members, "FINISH"]}
+    targets.update({name[:-len("_agent")].lower(): name for name in members if name.endswith("_agent")})
+    raw_next = str(data.get("next", "")).strip()
+    next_route = targets.get(raw_next.lower())
+    if next_route is None:
+        return None, True
+    route = {
+        "next": next_route,
+        "task_description_for_agent": str(data.get("task_description_for_agent") or ""),
+        "message_completion_summary": str(data.get("message_completion_summary") or ""),
+    }
+    if next_route != "FINISH" and not route["task_description_for_agent"].strip():
+        return None, True
+    repaired = repaired or next_route != raw_next or any(key not in data for key in ROUTING_SCHEMA["required"])
+    return route, repaired
+
+
+def get_routing_metrics() -> dict:
+    """Return calls, failures, repairs, retries and mean latency per routing mode."""
+    report = {}
+    for mode, counter in ROUTING_METRICS.items():
+        calls = counter["calls"]
+        report[mode] = {
+            **counter,
+            "failure_rate": round(counter["failures"] / calls, 4) if calls else 0.0,
+            "mean_latency_ms": round(counter["latency_ms"] / calls, 2) if calls else 0.0,
+        }
+    return report
+
+
+def create_router(llm=None, routing_mode: str = None):
+    """
+    Creates the routing function of the supervisor: messages -> SupervisorOutput dict.
+
+    Args:
+        llm: Optional chat model. Defaults to supervisor_llm, or constrained_supervisor_llm in
+            constrained mode (a custom model should then be bound to ROUTING_SCHEMA itself).
+        routing_mode (str, optional): One of ROUTING_MODES. Defaults to SUPERVISOR_ROUTING_MODE.
+    """
+    mode = routing_mode or SUPERVISOR_ROUTING_MODE
+    if mode not in ROUTING_MODES:
+        raise ValueError(f"Unknown SUPERVISOR_ROUTING_MODE '{mode}', expected one of {ROUTING_MODES}.")
+
+    if mode == "structured":
+        structured_llm = instrument_llm(schedule_llm(llm or supervisor_llm, "supervisor")).with_structured_output(SupervisorOutput)
+
+        def generate(messages: list) -> tuple:
+            return structured_llm.invoke(messages), 1
+    else:
+        constrained_llm = instrument_llm(schedule_llm(llm, "supervisor")) if llm is not None else constrained_supervisor_llm
+
+        def generate(messages: list) -> tuple:
+            # A user message: Ollama merges all system messages into the system block at the
+            # start of the prompt, which would re-evaluate the whole history.
+            messages = messages + [{"role": "user", "content": routing_format_prompt}]
+            for attempt in range(ROUTING_MAX_RETRIES + 1):
+                route, repaired = parse_routing_output(constrained_llm.invoke(messages).content)
+                if route is not None:
+                    if repaired:
+                        ROUTING_METRICS[mode]["repaired"] += 1
+                    return route, attempt + 1
+                ROUTING_METRICS[mode]["retries"] += 1
+            raise ValueError("The supervisor routing output could not be parsed.")
+
+    def route(messages: list) -> dict:
+        metrics = ROUTING_METRICS[mode]
+        metrics["calls"] += 1
+        started = time.perf_counter()
+        try:
+            response, attempts = generate(messages)
+        except Exception:
+            metrics["failures"] += 1
+            raise
+        finally:
+            metrics["latency_ms"] += int((time.perf_counter() - started) * 1000)
+        current_span = get_current_span()
+        if current_span is not None:
+            current_span.set("routing_mode", mode)
+            current_span.set("routing_attempts", attempts)
+        return response
+
+    return route
+
+
+def create_supervisor_node(llm=None, routing_mode: str = None):
+    """
+    Creates the supervisor node function.
+
+    Args:
+        llm: Optional chat model used for routing. Defaults to supervisor_llm.
+        routing_mode (str, optional): "structured" or "constrained", see create_router.
+    """
+    router = create_router(llm, routing_mode)
+
+    def supervisor_node(state: State) -> Command[Literal[*members, "__end__"]]:
+        # Combine the supervisor system prompt with the conversation history. The system prompt
+        # is the only system message and the history only grows at the end, so Ollama can reuse
+        # the cached prefix.
+        messages = [{"role": "system", "content": supervisor_system_prompt}] + state["messages"]
+
+        # Offer the prefetched digest so common requests can be answered without sub-agents.
+        # It changes between calls, so it goes last, as a user message: Ollama would merge a
+        # system message into the system block at the start of the prompt.
+        digest = get_digest()
+        if digest:
+            messages.append({"role": "user", "content": digest_prompt.format(digest=digest)})
+
+        response = router(messages)
+        goto = response["next"]
+
+        if goto == "FINISH":
+            update = {"next": END}
+            summary = response.get("message_completion_summary")
+            if summary:
+                update["messages"] = [AIMessage(content=summary, name="supervisor")]
+            return Command(goto=END, update=update)
+
+        # Append the tailored instructions to the conversation history, as a user message so the
+        # system block at the start of the prompt stays the same.
+        new_messages = [HumanMessage(content=response["task_description_for_agent"], name="supervisor")]
+        return Command(goto=goto, update={"next": goto, "messages": new_messages})
 
-    if goto == "FINISH":
-        return Command(goto=END, update={"next": END})
+    return traced_node("supervisor", supervisor_node)
 
-    # Append the tailored instructions to the conversation history.
-    new_messages = [{"role": "system", "content": response["task_description_for_agent"]}]
-    return Command(goto=goto, update={"next": goto, "messages": new_messages})
\ No newline at end of file
+supervisor_node = create_supervisor_node()
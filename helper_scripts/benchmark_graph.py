@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark the overhead of the supervisor graph itself, without Ollama or Google.
+
+The real graph is compiled through main.build_graph() with the scripted chat models from
+fake_chat_models.py, and the real tools are pointed at an in-process fake Google API server.
+Many sessions are run concurrently and the script reports:
+  - graph-level throughput (sessions/s)
+  - per-node latency (p50/p99)
+  - state size growth per graph step
+  - memory per session (tracemalloc, measured in a separate sequential pass)
+
+Results can be saved with --output and compared with a previous run using --compare, so
+numbers from different commits can be put side by side.
+
+Usage:
+    python helper_scripts/benchmark_graph.py --sessions 200 --concurrency 16 --output bench.json
+    python helper_scripts/benchmark_graph.py --compare bench.json
+"""
+import gc
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+from langchain_core.messages import messages_to_dict
+
+# Add the parent directory to the Python module search path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fake_google_server import start_server
+from load_test_tools import FAKE_IDS, percentile, wait_for_outbox
+
+
+def state_size(state: dict) -> tuple:
+    """Return (number of messages, serialized size in bytes) of a graph state."""
+    messages = state.get("messages", [])
+    serialized = json.dumps({
+        "messages": messages_to_dict(messages),
+        **{k: v for k, v in state.items() if k != "messages"},
+    }, default=str)
+    return len(messages), len(serialized.encode("utf-8"))
+
+
+def run_session(graph, request: str, thread_id: str) -> dict:
+    """Run one session through the graph and collect node timings and state sizes."""
+    config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 50}
+    node_latencies = defaultdict(list)
+    state_sizes = []
+
+    started = time.perf_counter()
+    last = started
+    for mode, chunk in graph.stream(
+        {"messages": [("user", request)]}, config, stream_mode=["updates", "values"]
+    ):
+        now = time.perf_counter()
+        if mode == "updates":
+            # The graph runs one node per step, so the time since the previous
+            # update is the time spent in this node.
+            for node_name in chunk:
+                node_latencies[node_name].append(now - last)
+            last = now
+        else:
+            state_sizes.append(state_size(chunk))
+
+    return {
+        "duration": time.perf_counter() - started,
+        "node_latencies": dict(node_latencies),
+        "state_sizes": state_sizes,
+    }
+
+
+def measure_memory(graph, requests: list, sessions: int) -> dict:
+    """Measure peak and retained memory per session by running sessions one at a time."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for i in range(sessions):
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            run_session(graph, requests[i % len(requests)], f"memory-{i}")
+            gc.collect()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kb_p50": round(percentile(peaks, 50) / 1024, 1),
+        "peak_kb_max": round(max(peaks) / 1024, 1) if peaks else 0.0,
+        "retained_kb_mean": round(sum(retained) / len(retained) / 1024, 1) if retained else 0.0,
+    }
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    """Aggregate per-session results into the benchmark report."""
+    node_latencies = defaultdict(list)
+    for result in results:
+        for node_name, latencies in result["node_latencies"].items():
+            node_latencies[node_name].extend(latencies)
+
+    final_messages = [r["state_sizes"][-1][0] for r in results if r["state_sizes"]]
+    final_bytes = [r["state_sizes"][-1][1] for r in results if r["state_sizes"]]
+    growth = []
+    for result in results:
+        sizes = [size for _, size in result["state_sizes"]]
+        growth.extend(b - a for a, b in zip(sizes, sizes[1:]))
+
+    durations = [r["duration"] for r in results]
+    return {
+        "sessions": len(results),
+        "throughput_sessions_per_s": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "session_ms": {
+            "p50": round(percentile(durations, 50) * 1000, 2),
+            "p99": round(percentile(durations, 99) * 1000, 2),
+        },
+        "nodes": {
+            name: {
+                "calls": len(latencies),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            }
+            for name, latencies in sorted(node_latencies.items())
+        },
+        "state": {
+            "final_messages_mean": round(sum(final_messages) / len(final_messages), 1) if final_messages else 0,
+            "final_bytes_mean": round(sum(final_bytes) / len(final_bytes), 1) if final_bytes else 0,
+            "growth_bytes_per_step_mean": round(sum(growth) / len(growth), 1) if growth else 0,
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def flatten(report: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def print_comparison(current: dict, baseline: dict) -> None:
+    """Print the metrics of two reports side by side with the relative change."""
+    print(f"\nComparison with {baseline.get('meta', {}).get('commit', '?')} "
+          f"-> {current.get('meta', {}).get('commit', '?')}")
+    old, new = flatten(baseline.get("results", {})), flatten(current.get("results", {}))
+    for key in sorted(set(old) | set(new)):
+        before, after = old.get(key), new.get(key)
+        if before is None or after is None:
+            print(f"  {key:50s} {before!s:>12} -> {after!s:>12}")
+            continue
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {key:50s} {before:>12} -> {after:>12}  {change}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the supervisor graph with scripted chat models.")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="sessions run before measuring")
+    parser.add_argument("--memory-sessions", type=int, default=20, help="sequential sessions for memory stats")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tool-latency-ms", type=float, default=0.0, help="latency of the fake Google API")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="compare with a report written by --output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    server = start_server(seed=args.seed, latency_ms=args.tool_latency_ms)
+    os.environ["GOOGLE_API_BASE_URL"] = server.base_url
+    for key, value in FAKE_IDS.items():
+        os.environ[key] = value
+    # Keep the mail index and the outbox of the benchmark away from the real ones. Every
+    # session of a scenario drafts the same email, so the outbox must not drop repeats.
+    state_dir = tempfile.mkdtemp(prefix="benchmark_graph_")
+    os.environ["MAIL_INDEX_PATH"] = os.path.join(state_dir, "mail_index.jsonl")
+    os.environ["OUTBOX_PATH"] = os.path.join(state_dir, "outbox.db")
+    os.environ["OUTBOX_DEDUP_WINDOW_S"] = "0"
+
+    # Each session waits for at most one LLM call at a time, so it never gets shed.
+    os.environ.setdefault("LLM_MAX_QUEUE", str(max(32, args.concurrency)))
+
+    from main import build_graph
+    from utils.llm_scheduler import get_llm_scheduler_metrics
+    from fake_chat_models import SCENARIOS, ScriptedSupervisorModel, scripted_agent_factory
+
+    today = date.today()
+    dinner = datetime.combine(today, dt_time(17), tzinfo=ZoneInfo("Europe/Stockholm"))
+    dates = {
+        "today": today.isoformat(),
+        "in_7_days": (today + timedelta(days=7)).isoformat(),
+        # Offset-aware, like the times the calendar agent passes to add_calendar_event.
+        "dinner_start": dinner.isoformat(),
+        "dinner_end": (dinner + timedelta(hours=1)).isoformat(),
+    }
+    graph = build_graph(
+        supervisor_llm=ScriptedSupervisorModel(),
+        agent_llm_factory=scripted_agent_factory(dates),
+    )
+
+    rng = random.Random(args.seed)
+    requests = list(SCENARIOS)
+    session_requests = [rng.choice(requests) for _ in range(args.sessions)]
+
+    # The tools print on every call, keep the report readable.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(args.warmup):
+            run_session(graph, requests[i % len(requests)], f"warmup-{i}")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(
+                lambda request: run_session(graph, request, str(uuid.uuid4())), session_requests
+            ))
+        elapsed = time.perf_counter() - started
+
+        memory = measure_memory(graph, requests, args.memory_sessions)
+        outbox = wait_for_outbox()
+
+    server.shutdown()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "tool_latency_ms": args.tool_latency_ms,
+        },
+        "results": {**summarize(results, elapsed), "memory_per_session": memory},
+        "llm_scheduler": get_llm_scheduler_metrics(),
+        "outbox": outbox,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare the latency of the local mail index (search_emails) with the remote Gmail search
+path (check_emails), for the same free-text queries.
+
+By default an in-process fake Google server with realistic latency is used; pass --real to
+run against the Gmail account in google_credentials/ instead.
+
+Usage:
+    python helper_scripts/benchmark_mail_search.py --latency-ms 120 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python module search path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fake_google_server import start_server
+from load_test_tools import FAKE_IDS, percentile
+
+QUERIES = [
+    "daycare invoice",
+    "tax documents",
+    "dinner sunday",
+    "borrowed books",
+    "project planning",
+    "tech newsletter local models",
+]
+
+
+def time_calls(fn, queries: list, repeat: int) -> tuple:
+    latencies, results = [], {}
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            results[query] = fn(query)
+            latencies.append(time.perf_counter() - started)
+    return latencies, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local mail index vs remote Gmail search latency.")
+    parser.add_argument("--real", action="store_true", help="use the real Gmail API")
+    parser.add_argument("--latency-ms", type=float, default=120.0, help="fake server latency per request")
+    parser.add_argument("--messages", type=int, default=500, help="synthetic emails on the fake server")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-results", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    server = None
+    if not args.real:
+        server = start_server(num_messages=args.messages, latency_ms=args.latency_ms)
+        os.environ["GOOGLE_API_BASE_URL"] = server.base_url
+        for key, value in FAKE_IDS.items():
+            os.environ[key] = value
+    # Build a throwaway index so the benchmark does not touch the real one, and sync it
+    # here instead of in the background.
+    os.environ["MAIL_INDEX_PATH"] = os.path.join(tempfile.mkdtemp(), "index.jsonl")
+    os.environ["MAIL_INDEX_SYNC_INTERVAL_S"] = "0"
+
+    from tools.tools_registry import TOOLS_REGISTRY
+    from utils.mail_index import get_mail_index
+
+    index = get_mail_index()
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        changes = index.sync()
+    print(f"Initial sync: {changes['added']} emails indexed in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        changes = index.sync()
+    print(f"Incremental sync: {changes['added']} new, {changes['removed']} removed emails "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    search_emails = TOOLS_REGISTRY["search_emails"]
+    check_emails = TOOLS_REGISTRY["check_emails"]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        local_latencies, local_results = time_calls(
+            lambda q: search_emails.invoke({"query": q, "max_results": args.max_results}), QUERIES, args.repeat
+        )
+        remote_latencies, remote_results = time_calls(
+            lambda q: check_emails.invoke({"query": q, "max_results": args.max_results}), QUERIES, args.repeat
+        )
+
+    report = {
+        "local_index": {
+            "p50_ms": round(percentile(local_latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(local_latencies, 99) * 1000, 3),
+        },
+        "remote_search": {
+            "p50_ms": round(percentile(remote_latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(remote_latencies, 99) * 1000, 3),
+        },
+        "results_per_query": {
+            query: {
+                "local": len(local_results[query].get("results", [])),
+                "remote": len(remote_results[query].get("emails", [])),
+            }
+            for query in QUERIES
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
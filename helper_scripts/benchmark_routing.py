@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compare the supervisor routing modes on the local Ollama model:
+  - structured:  with_structured_output(SupervisorOutput), the default
+  - constrained: Ollama JSON-schema format constraint, token budget and local repair
+
+Each scenario request from fake_chat_models.py is routed --repeat times per mode. The script
+reports p50/p99 routing latency, the failure rate, how often the output needed repair and how
+often the first route matches the scenario's expected agent.
+
+Requires a running Ollama with the supervisor model pulled.
+
+Usage:
+    python helper_scripts/benchmark_routing.py --repeat 5 --output routing.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from langchain_core.messages import HumanMessage
+
+# Add the parent directory to the Python module search path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fake_chat_models import SCENARIOS
+from load_test_tools import percentile
+
+
+def benchmark_mode(mode: str, repeat: int) -> dict:
+    from agents.supervisor import ROUTING_METRICS, create_router, supervisor_system_prompt
+
+    route = create_router(routing_mode=mode)
+    latencies, correct, failures = [], 0, []
+    for _ in range(repeat):
+        for request, scenario in SCENARIOS.items():
+            messages = [{"role": "system", "content": supervisor_system_prompt}, HumanMessage(content=request)]
+            started = time.perf_counter()
+            try:
+                response = route(messages)
+                correct += response["next"] == scenario["routes"][0]
+            except Exception as error:
+                failures.append(f"{type(error).__name__}: {error}")
+            latencies.append(time.perf_counter() - started)
+
+    calls = len(latencies)
+    metrics = ROUTING_METRICS[mode]
+    return {
+        "calls": calls,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "failure_rate": round(len(failures) / calls, 4) if calls else 0.0,
+        "repair_rate": round(metrics["repaired"] / calls, 4) if calls else 0.0,
+        "retries": metrics["retries"],
+        "route_accuracy": round(correct / calls, 4) if calls else 0.0,
+        "first_failure": failures[0] if failures else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the supervisor routing modes on Ollama.")
+    parser.add_argument("--modes", nargs="*", default=["structured", "constrained"])
+    parser.add_argument("--repeat", type=int, default=3, help="times each scenario is routed per mode")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for mode in args.modes:
+        report[mode] = benchmark_mode(mode, args.repeat)
+        stats = report[mode]
+        print(
+            f"{mode:12s} p50 {stats['p50_ms']:9.1f} ms   p99 {stats['p99_ms']:9.1f} ms   "
+            f"failures {stats['failure_rate']:.1%}   repaired {stats['repair_rate']:.1%}   "
+            f"correct route {stats['route_accuracy']:.1%}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
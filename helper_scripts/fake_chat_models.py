@@ -0,0 +1,203 @@
+"""
+Deterministic stand-ins for the Ollama chat models, used by the graph benchmarks.
+
+The scripted models do not keep any state between calls: every decision is derived from the
+messages they receive, so many sessions can share one model instance and runs are repeatable.
+
+A scenario is selected by the first user message of a session and lists:
+  - the supervisor routing decisions, in order
+  - for each agent, the tool calls it makes before answering
+"""
+import json
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage, BaseMessage, HumanMessage, ToolMessage, convert_to_messages,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from agents_config import members
+
+SCENARIOS = {
+    "fetch all contacts": {
+        "routes": ["contact_agent"],
+        "tool_calls": {
+            "contact_agent": [("get_contacts", {})],
+        },
+    },
+    "summarize my week": {
+        "routes": ["calendar_agent"],
+        "tool_calls": {
+            "calendar_agent": [
+                ("get_current_date_and_time", {}),
+                ("get_calendar_events", {"start_date": "{today}", "end_date": "{in_7_days}"}),
+            ],
+        },
+    },
+    "what's new in my inbox": {
+        "routes": ["email_agent"],
+        "tool_calls": {
+            "email_agent": [("check_emails", {"query": "is:unread", "max_results": 10})],
+        },
+    },
+    "email peter a summary of the week": {
+        "routes": ["calendar_agent", "contact_agent", "email_agent"],
+        "tool_calls": {
+            "calendar_agent": [
+                ("get_current_date_and_time", {}),
+                ("get_calendar_events", {"start_date": "{today}", "end_date": "{in_7_days}"}),
+            ],
+            "contact_agent": [("get_single_contact", {"query": "peter"})],
+            "email_agent": [
+                ("create_draft", {
+                    "to_email": "peter.chen@work.example",
+                    "subject": "Our week",
+                    "body": "Here is a summary of the week.",
+                }),
+            ],
+        },
+    },
+    "make a meal plan and add it to the family calendar": {
+        "routes": ["meal_planner_agent", "calendar_agent"],
+        "tool_calls": {
+            "meal_planner_agent": [("plan_meals", {"start_date": "{today}", "days": 7, "required": ["Puttanesca", "Fish Tacos"]})],
+            "calendar_agent": [
+                ("get_current_date_and_time", {}),
+                ("add_calendar_event", {
+                    "startDate": "{dinner_start}",
+                    "endDate": "{dinner_end}",
+                    "calendar_name": "family",
+                    "title": "Puttanesca",
+                    "description": "spaghetti, tomatoes, olives, capers, garlic, anchovies",
+                }),
+            ],
+        },
+    },
+}
+
+
+def _content_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return json.dumps(content)
+
+
+def _approx_tokens(messages: List[BaseMessage]) -> int:
+    # Rough whitespace tokenization, good enough to make token metrics non-zero.
+    return sum(len(_content_text(m).split()) for m in messages)
+
+
+def find_scenario(messages: List[BaseMessage]) -> dict:
+    """Return the scenario matching the first user message of the conversation."""
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            request = _content_text(message).strip().lower()
+            if request in SCENARIOS:
+                return SCENARIOS[request]
+            raise KeyError(f"No benchmark scenario for request '{request}'.")
+    raise KeyError("No user message found in the conversation.")
+
+
+def _fill_dates(args: dict, dates: dict) -> dict:
+    return {k: v.format(**dates) if isinstance(v, str) else v for k, v in args.items()}
+
+
+class ScriptedSupervisorModel:
+    """
+    Replays the supervisor routing decisions of a scenario.
+
+    The next route is chosen by counting the agent answers already in the conversation.
+    """
+
+    def with_structured_output(self, schema, **kwargs):
+        return RunnableLambda(self.route, name="ScriptedSupervisor")
+
+    def route(self, messages: list) -> dict:
+        messages = convert_to_messages(messages)
+        scenario = find_scenario(messages)
+        answered = sum(1 for m in messages if isinstance(m, AIMessage) and m.name in members)
+        routes = scenario["routes"]
+        if answered >= len(routes):
+            return {
+                "next": "FINISH",
+                "task_description_for_agent": "",
+                "message_completion_summary": "All sub-tasks are complete.",
+            }
+        agent = routes[answered]
+        return {
+            "next": agent,
+            "task_description_for_agent": f"Please handle this for {agent}: {_content_text(messages[-1])[:200]}",
+            "message_completion_summary": "",
+        }
+
+
+class ScriptedAgentModel(BaseChatModel):
+    """
+    Replays the tool calls of a sub-agent for the current scenario, then answers.
+
+    The number of tool calls already made is the number of ToolMessages after the
+    latest supervisor instruction (a HumanMessage named "supervisor").
+    """
+
+    agent_name: str
+    dates: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-agent"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        scenario = find_scenario(messages)
+        script = scenario["tool_calls"].get(self.agent_name, [])
+
+        last_instruction = max(
+            i for i, m in enumerate(messages) if isinstance(m, HumanMessage) and m.name == "supervisor"
+        )
+        tool_results = [m for m in messages[last_instruction:] if isinstance(m, ToolMessage)]
+        step = len(tool_results)
+
+        if step < len(script):
+            name, args = script[step]
+            message = AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": name,
+                    "args": _fill_dates(args, self.dates),
+                    "id": f"call_{self.agent_name}_{last_instruction}_{step}",
+                    "type": "tool_call",
+                }],
+            )
+        else:
+            summary = "; ".join(_content_text(m)[:80] for m in tool_results)
+            message = AIMessage(content=f"{self.agent_name} finished. {summary}")
+
+        input_tokens = _approx_tokens(messages)
+        output_tokens = _approx_tokens([message]) + 1
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def scripted_agent_factory(dates: dict):
+    """Return an llm_factory for create_agent_node that builds ScriptedAgentModels."""
+
+    def factory(agent_name: str, model_name: str):
+        return ScriptedAgentModel(agent_name=agent_name, dates=dates)
+
+    return factory
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the subset of Google APIs used by the tools in tools/.
+
+It serves seeded synthetic data for:
+  - Calendar: events.list, events.insert, freebusy.query
+  - Gmail:    messages.list/get/modify/send, drafts.create, labels.list
+  - Sheets:   spreadsheets.values.get
+
+Latency, error rate and page size are configurable so the tools can be load tested without
+touching real Gmail, Calendar and Sheets quotas. Point the tools at it by setting
+GOOGLE_API_BASE_URL=http://127.0.0.1:8765 in .env (see utils/google_service.py).
+
+Usage:
+    python helper_scripts/fake_google_server.py --port 8765 --latency-ms 80 --error-rate 0.02
+"""
+import re
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+DEFAULT_PORT = 8765
+
+SENDERS = [
+    ("Little Oaks Daycare", "billing@littleoaks.example"),
+    ("Tech Weekly", "newsletter@techweekly.example"),
+    ("Chain Digest", "hello@chaindigest.example"),
+    ("Peter Chen", "peter.chen@work.example"),
+    ("Grandma", "grandma@family.example"),
+    ("City Library", "noreply@library.example"),
+    ("Shop Deals", "offers@shopdeals.example"),
+    ("Accounting Firm", "accounts@ledger.example"),
+]
+
+SUBJECTS = [
+    "Invoice for {month} daycare fees",
+    "This week in tech: {topic}",
+    "Market update: {topic}",
+    "Re: project planning for {month}",
+    "Dinner on Sunday?",
+    "Your borrowed books are due soon",
+    "{percent}% off everything this weekend",
+    "Quarterly tax documents for {month}",
+]
+
+BODY_SENTENCES = [
+    "Please find the details below.",
+    "Let me know if you have any questions.",
+    "The invoice is due at the end of the month.",
+    "We are looking forward to seeing you.",
+    "Remember to bring the signed forms.",
+    "Here is a summary of the most important news this week.",
+    "The meeting has been moved to Thursday afternoon.",
+    "Payment can be made by bank transfer.",
+    "Thanks again for your help with the planning.",
+    "Unsubscribe at any time from your account settings.",
+]
+
+TOPICS = ["local models", "home automation", "energy prices", "open source", "travel"]
+MONTHS = ["January", "February", "March", "April", "May", "June"]
+
+EVENT_TITLES = [
+    "Puttanesca", "Fish Tacos", "Swimming lessons", "Dentist", "Team sync",
+    "Parent-teacher meeting", "Yoga", "Grocery run", "Football practice", "Date night",
+]
+
+RECIPES = [
+    ["Puttanesca", "spaghetti, tomatoes, olives, capers, garlic, anchovies"],
+    ["Fish Tacos", "white fish, tortillas, cabbage, lime, sour cream, coriander"],
+    ["Bonus veggie stew", "carrots, potatoes, celery, onion, garlic, canned tomatoes, kidney beans"],
+    ["Kikärtsgyros", "chickpeas, red onion, garlic, cumin, yogurt, cucumber, tomato, pita bread"],
+    ["Italian bean soup", "white beans, canned tomatoes, onion, garlic, carrot, celery, rosemary"],
+    ["Chicken curry", "chicken, onion, garlic, ginger, curry paste, coconut milk, rice"],
+    ["Lentil bolognese", "red lentils, onion, carrot, garlic, canned tomatoes, spaghetti"],
+    ["Salmon with potatoes", "salmon, potatoes, dill, lemon, sour cream"],
+    ["Halloumi salad", "halloumi, lettuce, tomato, cucumber, red onion, olive oil"],
+    ["Beef tacos", "minced beef, tortillas, tomato, lettuce, cheese, sour cream"],
+]
+
+CONTACTS = [
+    ["name", "email"],
+    ["Anna", "anna@family.example"],
+    ["Peter Chen", "peter.chen@work.example"],
+    ["Grandma", "grandma@family.example"],
+    ["Little Oaks Daycare", "billing@littleoaks.example"],
+]
+
+SYSTEM_LABELS = ["INBOX", "UNREAD", "IMPORTANT", "SPAM", "SENT", "DRAFT", "STARRED"]
+USER_LABELS = {
+    "Label_23092374_example": "marketing",
+    "Label_1": "work",
+    "Label_2": "personal",
+    "Label_3": "accounting",
+}
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def _rfc3339(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+# Time zone of every fake calendar, used for naive times and when events.list gets no timeZone.
+CALENDAR_TIME_ZONE = "Europe/Stockholm"
+
+
+def _parse_rfc3339(value: str) -> datetime:
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _in_time_zone(when: dict, time_zone: str) -> dict:
+    """
+    Return an event start/end with dateTime as an RFC3339 value with the offset of `time_zone`.
+    A naive dateTime is read in the time zone given next to it, like the real API does.
+    """
+    if "dateTime" not in when:
+        return dict(when)
+    dt = datetime.fromisoformat(when["dateTime"].replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo(when.get("timeZone") or CALENDAR_TIME_ZONE))
+    return {**when, "dateTime": _rfc3339(dt.astimezone(ZoneInfo(time_zone)))}
+
+
+class FakeGoogleData:
+    """
+    Seeded synthetic Gmail, Calendar and Sheets data shared by all request handlers.
+    """
+
+    def __init__(self, seed: int = 42, num_messages: int = 200, events_per_calendar: int = 60):
+        self.seed = seed
+        self.events_per_calendar = events_per_calendar
+        self.now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        self.lock = threading.Lock()
+        self.calendars = {}
+        self.messages = {}
+        self.message_order = []
+        self.drafts = {}
+        self.sheets = {"contacts": CONTACTS, "recipes_db": [["name", "ingredients"]] + RECIPES}
+        self._id_counter = 0
+        self._seed_messages(num_messages)
+
+    def next_id(self) -> str:
+        with self.lock:
+            self._id_counter += 1
+            return f"{0xF000000 + self._id_counter:016x}"
+
+    def _seed_messages(self, num_messages: int) -> None:
+        rng = random.Random(self.seed)
+        for i in range(num_messages):
+            # SUBJECTS is aligned with SENDERS so subjects match their sender.
+            index = rng.randrange(len(SENDERS))
+            sender_name, sender_email = SENDERS[index]
+            subject = SUBJECTS[index].format(
+                month=rng.choice(MONTHS), topic=rng.choice(TOPICS), percent=rng.choice([10, 20, 30])
+            )
+            body = " ".join(rng.sample(BODY_SENTENCES, 4))
+            labels = ["INBOX"]
+            if rng.random() < 0.4:
+                labels.append("UNREAD")
+            if rng.random() < 0.15:
+                labels.append("IMPORTANT")
+            if rng.random() < 0.3:
+                labels.append(rng.choice(list(USER_LABELS)))
+            sent_at = self.now - timedelta(minutes=37 * i)
+            message_id = f"{i + 1:016x}"
+            self.messages[message_id] = {
+                "id": message_id,
+                "threadId": message_id,
+                "labelIds": labels,
+                "snippet": body[:100],
+                "internalDate": str(int(sent_at.timestamp() * 1000)),
+                "payload": {
+                    "mimeType": "text/plain",
+                    "headers": [
+                        {"name": "From", "value": f"{sender_name} <{sender_email}>"},
+                        {"name": "To", "value": "anna@family.example"},
+                        {"name": "Subject", "value": subject},
+                        {"name": "Date", "value": sent_at.strftime("%a, %d %b %Y %H:%M:%S +0000")},
+                    ],
+                    "body": {"size": len(body), "data": _b64(body)},
+                },
+            }
+            self.message_order.append(message_id)
+
+    def calendar_events(self, calendar_id: str) -> list:
+        """Return (and lazily seed) the events of a calendar, sorted by start time."""
+        with self.lock:
+            if calendar_id not in self.calendars:
+                rng = random.Random(f"{self.seed}:{calendar_id}")
+                events = []
+                for i in range(self.events_per_calendar):
+                    start = self.now + timedelta(hours=rng.randint(-7 * 24, 30 * 24))
+                    event = {
+                        "kind": "calendar#event",
+                        "id": f"{calendar_id[:8]}evt{i:05d}",
+                        "status": "confirmed",
+                        "summary": rng.choice(EVENT_TITLES),
+                        "description": rng.choice(BODY_SENTENCES),
+                    }
+                    if rng.random() < 0.15:
+                        event["start"] = {"date": start.date().isoformat()}
+                        event["end"] = {"date": (start.date() + timedelta(days=1)).isoformat()}
+                    else:
+                        end = start + timedelta(minutes=rng.choice([30, 60, 90, 120]))
+                        event["start"] = {"dateTime": _rfc3339(start), "timeZone": "Europe/Stockholm"}
+                        event["end"] = {"dateTime": _rfc3339(end), "timeZone": "Europe/Stockholm"}
+                    events.append(event)
+                self.calendars[calendar_id] = events
+            events = list(self.calendars[calendar_id])
+        events.sort(key=lambda e: _event_bounds(e)[0])
+        return events
+
+
+def _event_bounds(event: dict) -> tuple:
+    start, end = event.get("start", {}), event.get("end", {})
+    if "dateTime" in start:
+        return _parse_rfc3339(start["dateTime"]), _parse_rfc3339(end["dateTime"])
+    start_dt = datetime.fromisoformat(start["date"]).replace(tzinfo=timezone.utc)
+    end_dt = datetime.fromisoformat(end["date"]).replace(tzinfo=timezone.utc)
+    return start_dt, end_dt
+
+
+def _header(message: dict, name: str) -> str:
+    for header in message["payload"].get("headers", []):
+        if header["name"].lower() == name.lower():
+            return header["value"]
+    return ""
+
+
+def _matches_query(message: dict, query: str) -> bool:
+    """Evaluate a small subset of the Gmail search syntax against a message."""
+    labels = message["labelIds"]
+    text = " ".join([
+        _header(message, "Subject"),
+        _header(message, "From"),
+        base64.urlsafe_b64decode(message["payload"]["body"]["data"]).decode("utf-8"),
+    ]).lower()
+    for token in query.split():
+        token = token.lower()
+        if token == "is:unread":
+            if "UNREAD" not in labels:
+                return False
+        elif token == "is:important":
+            if "IMPORTANT" not in labels:
+                return False
+        elif token == "has:nouserlabels":
+            if any(label.startswith("Label_") for label in labels):
+                return False
+        elif token.startswith("from:"):
+            if token[5:] not in _header(message, "From").lower():
+                return False
+        elif token.startswith("label:"):
+            wanted = token[6:]
+            names = [USER_LABELS.get(label, label).lower() for label in labels]
+            if wanted not in names:
+                return False
+        elif token.startswith("newer_than:") and token.endswith("d"):
+            days = int(token[11:-1] or 0)
+            sent_at = int(message["internalDate"]) / 1000
+            if sent_at < time.time() - days * 86400:
+                return False
+        elif token not in text:
+            return False
+    return True
+
+
+def _paginate(items: list, page_token: str, max_results: int, page_size: int) -> tuple:
+    """Slice a list using an integer offset page token. Returns (page, next_page_token)."""
+    offset = int(page_token) if page_token else 0
+    limit = max_results if max_results > 0 else page_size
+    if page_size > 0:
+        limit = min(limit, page_size)
+    page = items[offset:offset + limit]
+    next_offset = offset + limit
+    next_token = str(next_offset) if next_offset < len(items) else None
+    return page, next_token
+
+
+def _cell_rows(a1_range: str) -> tuple:
+    """Parse the row bounds of an A1 range such as "contacts!A1:B3" or "contacts!A1:B"."""
+    sheet_name, _, cells = a1_range.partition("!")
+    rows = re.findall(r"[A-Z]+(\d*)", cells)
+    first = int(rows[0]) if rows and rows[0] else 1
+    last = int(rows[1]) if len(rows) > 1 and rows[1] else None
+    return sheet_name, first, last
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the endpoints the tools use."""
+
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("GET", r"^/calendar/v3/calendars/([^/]+)/events$", "events_list"),
+        ("POST", r"^/calendar/v3/calendars/([^/]+)/events$", "events_insert"),
+        ("POST", r"^/calendar/v3/freeBusy$", "freebusy_query"),
+        ("GET", r"^/gmail/v1/users/([^/]+)/messages$", "messages_list"),
+        ("POST", r"^/gmail/v1/users/([^/]+)/messages/send$", "messages_send"),
+        ("GET", r"^/gmail/v1/users/([^/]+)/messages/([^/]+)$", "messages_get"),
+        ("POST", r"^/gmail/v1/users/([^/]+)/messages/([^/]+)/modify$", "messages_modify"),
+        ("POST", r"^/gmail/v1/users/([^/]+)/drafts$", "drafts_create"),
+        ("GET", r"^/gmail/v1/users/([^/]+)/labels$", "labels_list"),
+        ("GET", r"^/v4/spreadsheets/([^/]+)/values/([^/]+)$", "values_get"),
+    ]
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        parsed = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        self.json_body = json.loads(raw_body) if raw_body else {}
+
+        for route_method, pattern, name in self.ROUTES:
+            match = re.match(pattern, parsed.path)
+            if route_method == method and match:
+                self.server.count(name)
+                self._simulate_latency()
+                if self._maybe_fail():
+                    return
+                args = [unquote(group) for group in match.groups()]
+                status, payload = getattr(self, name)(*args)
+                self._send_json(status, payload)
+                return
+
+        self._send_error(404, "Not Found", "NOT_FOUND")
+
+    def _simulate_latency(self) -> None:
+        server = self.server
+        if server.latency_ms <= 0 and server.jitter_ms <= 0:
+            return
+        with server.rng_lock:
+            jitter = server.rng.uniform(-server.jitter_ms, server.jitter_ms)
+        time.sleep(max(0.0, server.latency_ms + jitter) / 1000)
+
+    def _maybe_fail(self) -> bool:
+        server = self.server
+        with server.rng_lock:
+            roll = server.rng.random()
+            rate_limited = server.rng.random() < 0.5
+        if roll >= server.error_rate:
+            return False
+        server.count("injected_errors")
+        if rate_limited:
+            self._send_error(429, "Rate Limit Exceeded", "RESOURCE_EXHAUSTED", "rateLimitExceeded")
+        else:
+            self._send_error(503, "The service is currently unavailable.", "UNAVAILABLE", "backendError")
+        return True
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, code: int, message: str, status: str, reason: str = "notFound") -> None:
+        self._send_json(code, {
+            "error": {
+                "code": code,
+                "message": message,
+                "status": status,
+                "errors": [{"message": message, "domain": "global", "reason": reason}],
+            }
+        })
+
+    # ---- Calendar ----
+
+    def events_list(self, calendar_id: str):
+        events = self.server.data.calendar_events(calendar_id)
+        time_min = self.query.get("timeMin")
+        time_max = self.query.get("timeMax")
+        if time_min:
+            lower = _parse_rfc3339(time_min)
+            events = [e for e in events if _event_bounds(e)[1] > lower]
+        if time_max:
+            upper = _parse_rfc3339(time_max)
+            events = [e for e in events if _event_bounds(e)[0] < upper]
+        page, next_token = _paginate(
+            events, self.query.get("pageToken"), int(self.query.get("maxResults", 250)), self.server.page_size
+        )
+        # Times are returned in the requested time zone, or the calendar's.
+        time_zone = self.query.get("timeZone") or CALENDAR_TIME_ZONE
+        page = [
+            {**e, "start": _in_time_zone(e["start"], time_zone), "end": _in_time_zone(e["end"], time_zone)}
+            for e in page
+        ]
+        payload = {"kind": "calendar#events", "summary": calendar_id, "timeZone": time_zone, "items": page}
+        if next_token:
+            payload["nextPageToken"] = next_token
+        return 200, payload
+
+    def events_insert(self, calendar_id: str):
+        data = self.server.data
+        event = dict(self.json_body)
+        event.update({"kind": "calendar#event", "id": data.next_id(), "status": "confirmed"})
+        # Store offset-qualified times, in the event's own time zone when it has one.
+        for key in ("start", "end"):
+            if key in event:
+                event[key] = _in_time_zone(event[key], event[key].get("timeZone") or CALENDAR_TIME_ZONE)
+        data.calendar_events(calendar_id)
+        with data.lock:
+            data.calendars[calendar_id].append(event)
+        return 200, event
+
+    def freebusy_query(self):
+        lower = _parse_rfc3339(self.json_body["timeMin"])
+        upper = _parse_rfc3339(self.json_body["timeMax"])
+        calendars = {}
+        for item in self.json_body.get("items", []):
+            busy = []
+            for event in self.server.data.calendar_events(item["id"]):
+                start, end = _event_bounds(event)
+                # Like the real API, all-day events do not block time unless marked busy.
+                if "date" in event["start"] or end <= lower or start >= upper:
+                    continue
+                busy.append({"start": _rfc3339(max(start, lower)), "end": _rfc3339(min(end, upper))})
+            calendars[item["id"]] = {"busy": busy}
+        return 200, {
+            "kind": "calendar#freeBusy",
+            "timeMin": self.json_body["timeMin"],
+            "timeMax": self.json_body["timeMax"],
+            "calendars": calendars,
+        }
+
+    # ---- Gmail ----
+
+    def messages_list(self, user_id: str):
+        data = self.server.data
+        query = self.query.get("q", "")
+        with data.lock:
+            messages = [data.messages[m] for m in data.message_order]
+        matching = [{"id": m["id"], "threadId": m["threadId"]} for m in messages if _matches_query(m, query)]
+        page, next_token = _paginate(
+            matching, self.query.get("pageToken"), int(self.query.get("maxResults", 100)), self.server.page_size
+        )
+        payload = {"messages": page, "resultSizeEstimate": len(matching)}
+        if next_token:
+            payload["nextPageToken"] = next_token
+        if not page:
+            del payload["messages"]
+        return 200, payload
+
+    def messages_get(self, user_id: str, message_id: str):
+        message = self.server.data.messages.get(message_id)
+        if message is None:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found.", "status": "NOT_FOUND"}}
+        return 200, message
+
+    def messages_modify(self, user_id: str, message_id: str):
+        data = self.server.data
+        with data.lock:
+            message = data.messages.get(message_id)
+            if message is None:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found.", "status": "NOT_FOUND"}}
+            labels = [l for l in message["labelIds"] if l not in self.json_body.get("removeLabelIds", [])]
+            for label in self.json_body.get("addLabelIds", []):
+                if label not in labels:
+                    labels.append(label)
+            message["labelIds"] = labels
+        return 200, {"id": message_id, "threadId": message["threadId"], "labelIds": labels}
+
+    def messages_send(self, user_id: str):
+        message_id = self.server.data.next_id()
+        return 200, {"id": message_id, "threadId": message_id, "labelIds": ["SENT"]}
+
+    def drafts_create(self, user_id: str):
+        data = self.server.data
+        draft_id = "r" + data.next_id()
+        message_id = data.next_id()
+        draft = {"id": draft_id, "message": {"id": message_id, "threadId": message_id, "labelIds": ["DRAFT"]}}
+        with data.lock:
+            data.drafts[draft_id] = self.json_body
+        return 200, draft
+
+    def labels_list(self, user_id: str):
+        labels = [{"id": name, "name": name, "type": "system"} for name in SYSTEM_LABELS]
+        labels += [{"id": label_id, "name": name, "type": "user"} for label_id, name in USER_LABELS.items()]
+        return 200, {"labels": labels}
+
+    # ---- Sheets ----
+
+    def values_get(self, spreadsheet_id: str, a1_range: str):
+        sheet_name, first, last = _cell_rows(a1_range)
+        rows = self.server.data.sheets.get(sheet_name)
+        if rows is None:
+            return 400, {"error": {"code": 400, "message": f"Unable to parse range: {a1_range}", "status": "INVALID_ARGUMENT"}}
+        values = rows[first - 1:last]
+        return 200, {"range": a1_range, "majorDimension": "ROWS", "values": values}
+
+
+class FakeGoogleServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the shared fake data and simulation settings."""
+
+    daemon_threads = True
+
+    def __init__(self, address, data: FakeGoogleData, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, page_size: int = 0, verbose: bool = False):
+        super().__init__(address, FakeGoogleHandler)
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.verbose = verbose
+        self.rng = random.Random(data.seed)
+        self.rng_lock = threading.Lock()
+        self.request_counts = Counter()
+        self._count_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str) -> None:
+        with self._count_lock:
+            self.request_counts[name] += 1
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, seed: int = 42, num_messages: int = 200,
+                 events_per_calendar: int = 60, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, page_size: int = 0, verbose: bool = False) -> FakeGoogleServer:
+    """
+    Start the stand-in server in a background thread.
+
+    Args:
+        host (str): Interface to bind to.
+        port (int): Port to bind to, 0 picks a free port.
+        seed (int): Seed for the synthetic data and the latency/error simulation.
+        num_messages (int): Number of synthetic Gmail messages.
+        events_per_calendar (int): Number of synthetic events generated per calendar ID.
+        latency_ms (float): Mean added latency per request in milliseconds.
+        jitter_ms (float): Uniform +/- jitter applied to the latency.
+        error_rate (float): Fraction of requests answered with a 429 or 503 error.
+        page_size (int): Maximum page size for list endpoints, 0 means no cap.
+        verbose (bool): Log every request.
+
+    Returns:
+        FakeGoogleServer: The running server. Call shutdown() to stop it.
+    """
+    data = FakeGoogleData(seed=seed, num_messages=num_messages, events_per_calendar=events_per_calendar)
+    server = FakeGoogleServer(
+        (host, port), data, latency_ms=latency_ms, jitter_ms=jitter_ms,
+        error_rate=error_rate, page_size=page_size, verbose=verbose,
+    )
+    thread = threading.Thread(target=server.serve_forever, name="fake-google-server", daemon=True)
+    thread.start()
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Google APIs used by the tools.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--messages", type=int, default=200, help="number of synthetic emails")
+    parser.add_argument("--events", type=int, default=60, help="number of synthetic events per calendar")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 429/503")
+    parser.add_argument("--page-size", type=int, default=0, help="cap on list page size (0 = no cap)")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = start_server(
+        host=args.host, port=args.port, seed=args.seed, num_messages=args.messages,
+        events_per_calendar=args.events, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, page_size=args.page_size, verbose=args.verbose,
+    )
+    print(f"Fake Google API server listening on {server.base_url}")
+    print(f"Set GOOGLE_API_BASE_URL={server.base_url} to point the tools at it.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("Request counts:", json.dumps(dict(server.request_counts), indent=2))
+        sys.exit(0)
@@ -1,5 +1,7 @@
 import os
+import sys
 import json
+import argparse
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -11,6 +13,11 @@ load_dotenv()
 # Calculate the directory of this script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
+# Add the parent directory to the Python module search path
+sys.path.append(os.path.join(script_dir, '..'))
+
+from utils.credential_store import DEFAULT_HOUSEHOLD, token_path as household_token_path
+
 # Define local paths to the token and credentials files (adjust as needed)
 TOKEN_PATH = os.path.join(script_dir, '..', 'google_credentials', 'token.json')
 CREDENTIALS_PATH = os.path.join(script_dir, '..', 'google_credentials', 'credentials.json')
@@ -22,17 +29,20 @@ SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
 ]
 
-def get_token():
+def get_token(token_path: str = TOKEN_PATH):
     """
     Load OAuth credentials for accessing Google APIs.
     This function loads credentials from disk, refreshes them if expired,
     or initiates a new OAuth flow if necessary.
+
+    Args:
+        token_path (str): Where the token is stored, TOKEN_PATH for the default household.
     """
     creds = None
 
     # Load credentials from the token file if it exists.
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+    if os.path.exists(token_path):
+        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
     
     # If credentials are invalid or not available, start a new OAuth flow.
     if not creds or not creds.valid:
@@ -43,11 +53,21 @@ def get_token():
             flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
             creds = flow.run_local_server(port=8080, prompt='consent', access_type='offline')
         # Save the newly obtained credentials to disk.
-        with open(TOKEN_PATH, "w") as token_file:
+        os.makedirs(os.path.dirname(token_path), exist_ok=True)
+        with open(token_path, "w") as token_file:
             token_file.write(creds.to_json())
 
     return creds
 
 if __name__ == '__main__':
-    credentials = get_token()
+    parser = argparse.ArgumentParser(description="Authorize a Google account for the assistant.")
+    parser.add_argument("--household", default=DEFAULT_HOUSEHOLD,
+                        help="store the token for this household (see utils/credential_store.py)")
+    args = parser.parse_args()
+    # The same path and household id validation as the credential store uses to read it.
+    try:
+        path = household_token_path(args.household)
+    except ValueError as error:
+        parser.error(str(error))
+    credentials = get_token(path)
     print("Credentials loaded successfully.")
\ No newline at end of file
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Load test the tools in TOOLS_REGISTRY against the local Google API stand-in server.
+
+By default an in-process fake server is started (see fake_google_server.py) and the tools are
+pointed at it through GOOGLE_API_BASE_URL. Use --base-url to target an already running server.
+
+Reports per-tool throughput, p50/p99 latency and error counts.
+
+Usage:
+    python helper_scripts/load_test_tools.py --concurrency 8 --calls 100 --latency-ms 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python module search path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fake_google_server import start_server
+
+# The tools read their sheet and calendar IDs at import time, so make sure they are set
+# before tools/ is imported. Real values from .env are kept.
+FAKE_IDS = {
+    "FAMILY_CAL": "family@group.calendar.example",
+    "PERSONAL_CAL": "personal@group.calendar.example",
+    "WORK_CAL": "work@group.calendar.example",
+    "RECIPES_GOOGLE_SHEET": "fake-recipes-sheet",
+    "CONTACT_GOOGLE_SHEET": "fake-contacts-sheet",
+}
+
+
+def sample_tool_args() -> dict:
+    """
+    Arguments used for each tool during the load test: a dict, or a function of the call
+    number for tools whose calls must differ (the outbox drops identical messages).
+    """
+    now = datetime.now().replace(microsecond=0)
+    return {
+        "get_current_date_and_time": {},
+        "get_calendar_events": {
+            "start_date": now.isoformat(),
+            "end_date": (now + timedelta(days=7)).isoformat(),
+        },
+        "find_free_slots": {
+            "start_date": now.date().isoformat(),
+            "end_date": (now + timedelta(days=7)).date().isoformat(),
+            "duration_minutes": 60,
+        },
+        "add_calendar_event": {
+            "startDate": (now + timedelta(days=1)).isoformat(),
+            "endDate": (now + timedelta(days=1, hours=1)).isoformat(),
+            "calendar_name": "family",
+            "title": "Puttanesca",
+            "description": "spaghetti, tomatoes, olives, capers, garlic, anchovies",
+        },
+        "get_recipes": {},
+        "plan_meals": {"start_date": now.date().isoformat(), "days": 14, "required": ["Puttanesca", "Fish Tacos"]},
+        "get_contacts": {},
+        "get_single_contact": {"query": "peter"},
+        "check_emails": {"query": "is:unread", "max_results": 10},
+        "search_emails": {"query": "daycare invoice", "max_results": 10},
+        "label_email": {"message_id": f"{1:016x}", "label": "marketing"},
+        "send_email": lambda i: {"to_email": "peter.chen@work.example", "subject": f"Load test {i}", "body": "Hello!"},
+        "create_draft": lambda i: {"to_email": "peter.chen@work.example", "subject": f"Load test {i}", "body": "Hello!"},
+        "get_outbox_status": {},
+    }
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_tool(tool, args: dict) -> tuple:
+    """Invoke a tool once. Returns (latency_seconds, error_or_None)."""
+    started = time.perf_counter()
+    error = None
+    try:
+        result = tool.invoke(args)
+        if isinstance(result, dict) and "error" in result:
+            error = str(result["error"])
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return time.perf_counter() - started, error
+
+
+def load_test_tool(tool, args, calls: int, concurrency: int) -> dict:
+    """Run a tool `calls` times with `concurrency` workers and summarize the latencies."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: run_tool(tool, args(i) if callable(args) else args), range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = [error for _, error in results if error]
+    return {
+        "calls": calls,
+        "errors": len(errors),
+        "throughput_per_s": round(calls / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def wait_for_outbox(timeout_s: float = 60.0) -> dict:
+    """
+    Wait until the outbox worker has delivered the queued messages, so none are in flight when
+    the fake server stops. Returns the outbox counts per status.
+    """
+    from utils.outbox import get_outbox
+
+    outbox = get_outbox()
+    deadline = time.monotonic() + timeout_s
+    counts = outbox.counts()
+    while (counts.get("queued") or counts.get("sending")) and time.monotonic() < deadline:
+        time.sleep(0.2)
+        counts = outbox.counts()
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Google tools against the fake API server.")
+    parser.add_argument("--base-url", help="use an already running fake server instead of starting one")
+    parser.add_argument("--tools", nargs="*", help="tool names to test (default: all with sample args)")
+    parser.add_argument("--calls", type=int, default=50, help="calls per tool")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_server(
+            seed=args.seed, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate, page_size=args.page_size,
+        )
+        base_url = server.base_url
+
+    os.environ["GOOGLE_API_BASE_URL"] = base_url
+    for key, value in FAKE_IDS.items():
+        if not os.getenv(key):
+            os.environ[key] = value
+    # Keep the mail index and the outbox of the load test away from the real ones.
+    state_dir = tempfile.mkdtemp(prefix="load_test_tools_")
+    os.environ["MAIL_INDEX_PATH"] = os.path.join(state_dir, "mail_index.jsonl")
+    os.environ["OUTBOX_PATH"] = os.path.join(state_dir, "outbox.db")
+
+    from tools.tools_registry import TOOLS_REGISTRY
+    from utils.rate_limiter import get_rate_limit_metrics
+    from utils.singleflight import get_singleflight_metrics
+
+    tool_args = sample_tool_args()
+    names = args.tools or [name for name in TOOLS_REGISTRY if name in tool_args]
+
+    report = {}
+    for name in names:
+        # The tools print on every call, keep the report readable.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            report[name] = load_test_tool(TOOLS_REGISTRY[name], tool_args.get(name, {}), args.calls, args.concurrency)
+        stats = report[name]
+        print(
+            f"{name:28s} {stats['throughput_per_s']:8.2f} calls/s   "
+            f"p50 {stats['p50_ms']:8.2f} ms   p99 {stats['p99_ms']:8.2f} ms   "
+            f"errors {stats['errors']}/{stats['calls']}"
+        )
+        if stats["first_error"]:
+            print(f"    first error: {stats['first_error'][:200]}")
+
+    report["_rate_limiter"] = get_rate_limit_metrics()
+    print("Rate limiter:", json.dumps(report["_rate_limiter"], indent=2))
+    report["_singleflight"] = get_singleflight_metrics()
+    print("Coalesced calls:", json.dumps(report["_singleflight"], indent=2))
+    if {"send_email", "create_draft"} & set(names):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            report["_outbox"] = wait_for_outbox()
+        print("Outbox:", json.dumps(report["_outbox"]))
+
+    if server is not None:
+        report["_server_request_counts"] = dict(server.request_counts)
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
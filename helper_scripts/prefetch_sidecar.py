@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Run the calendar/mail prefetch scheduler as a sidecar process.
+
+The sidecar refreshes the snapshot every PREFETCH_INTERVAL_S seconds and writes it to
+PREFETCH_SNAPSHOT_PATH. The assistant process (with the same PREFETCH_SNAPSHOT_PATH in .env)
+reads the snapshot instead of fetching itself.
+
+Usage:
+    PREFETCH_SNAPSHOT_PATH=prefetch_snapshot.json python helper_scripts/prefetch_sidecar.py
+"""
+import os
+import sys
+import time
+
+# Add the parent directory to the Python module search path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.prefetch import PREFETCH_INTERVAL_S, PREFETCH_SNAPSHOT_PATH, PrefetchScheduler
+
+if __name__ == "__main__":
+    if not PREFETCH_SNAPSHOT_PATH:
+        sys.exit("Set PREFETCH_SNAPSHOT_PATH so the assistant can read the prefetched snapshot.")
+
+    scheduler = PrefetchScheduler(PREFETCH_INTERVAL_S)
+    scheduler.start()
+    print(f"Prefetching every {PREFETCH_INTERVAL_S:.0f}s into {PREFETCH_SNAPSHOT_PATH}")
+    try:
+        while scheduler.is_alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
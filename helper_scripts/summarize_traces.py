@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Summarize the spans written by utils/tracing.py (TRACE_EXPORTER=jsonl) per request.
+
+Usage:
+    python helper_scripts/summarize_traces.py                  # all traces in TRACE_PATH
+    python helper_scripts/summarize_traces.py --last 1         # most recent request only
+    python helper_scripts/summarize_traces.py --trace-id <id>
+"""
+import os
+import sys
+import json
+import argparse
+
+# Add the parent directory to the Python module search path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.tracing import TRACE_PATH, load_spans, summarize_trace
+
+def print_summary(trace_id: str, summary: dict) -> None:
+    print(f"Trace {trace_id}: {summary['wall_ms']:.1f} ms, {summary['spans']} spans, "
+          f"{summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion tokens")
+    for name, entry in summary["by_name"].items():
+        print(f"  {name:40s} calls {entry['calls']:4d}   total {entry['total_ms']:10.1f} ms   "
+              f"max {entry['max_ms']:9.1f} ms   tokens {entry['prompt_tokens']}/{entry['completion_tokens']}   "
+              f"errors {entry['errors']}")
+    if summary.get("prompt_eval"):
+        print("  Ollama prompt eval per LLM call (ms / evaluated tokens of prompt tokens):")
+    for node, entry in summary.get("prompt_eval", {}).items():
+        calls = ", ".join(
+            f"{ms:.0f}/{evaluated}/{total}"
+            for ms, evaluated, total in zip(entry["prompt_eval_ms"], entry["prompt_eval_tokens"], entry["prompt_tokens"])
+        )
+        print(f"    {node:38s} {calls}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize tracing spans per request.")
+    parser.add_argument("--path", default=TRACE_PATH)
+    parser.add_argument("--trace-id")
+    parser.add_argument("--last", type=int, help="only show the N most recent traces")
+    parser.add_argument("--json", action="store_true", help="print the raw summary as JSON")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path)
+    if args.trace_id:
+        spans = [s for s in spans if s["trace_id"] == args.trace_id]
+    summaries = summarize_trace(spans)
+
+    # Order traces by their first span.
+    first_seen = {}
+    for s in spans:
+        first_seen.setdefault(s["trace_id"], s["start_time"])
+    trace_ids = sorted(summaries, key=lambda t: first_seen[t])
+    if args.last:
+        trace_ids = trace_ids[-args.last:]
+
+    if args.json:
+        print(json.dumps({t: summaries[t] for t in trace_ids}, indent=2))
+    else:
+        for trace_id in trace_ids:
+            print_summary(trace_id, summaries[trace_id])
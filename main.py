@@ -1,9 +1,12 @@
 # main.py
 from langgraph.graph import MessagesState, StateGraph, START, END
-from agents.supervisor import supervisor_node
+from agents.supervisor import create_supervisor_node
 from utils.react_agent_factory import create_agent_node
 from rich.pretty import Pretty
 from rich import print as rprint
+from utils.tracing import start_trace, traced_graph
+from utils.prefetch import PREFETCH_ENABLED, PREFETCH_SNAPSHOT_PATH, start_prefetch_scheduler
+from utils.mail_index import MAIL_INDEX_ENABLED, MAIL_INDEX_SYNC_INTERVAL_S, get_mail_index
 
 # Import the shared members list
 from agents_config import members
@@ -11,28 +14,56 @@ from agents_config import members
 class State(MessagesState):
     ext: str
 
-builder = StateGraph(State)
-builder.add_edge(START, "supervisor")
-builder.add_node("supervisor", supervisor_node)
-
-# Loop through the members list to add each agent node
-for member in members:
-    builder.add_node(member, create_agent_node(member))
-graph = builder.compile()
-graph.name = "Home Assistant"
-
-### Visualize the agent graph using Mermaid syntax ###
-mermaid_diagram = graph.get_graph().draw_mermaid()
-rprint("[bold cyan]Agent Graph Visualization (Mermaid):[/bold cyan]")
-rprint(mermaid_diagram)
-rprint("------- PASTE INTO https://mermaid.live/ -------")
-
-
-### For running via terminal, comment out if running via LangGraph Studio or API ###
-input_data = {
-    "messages": [("user", "fetch all contacts")]
- }
- 
-for s in graph.stream(input_data, subgraphs=True):
-    rprint(Pretty(s))
-    rprint("-" * 50)
\ No newline at end of file
+def build_graph(supervisor_llm=None, agent_llm_factory=None):
+    """
+    Builds and compiles the home assistant graph.
+
+    Args:
+        supervisor_llm: Optional chat model for the supervisor. Defaults to the Ollama model in agents/supervisor.py.
+        agent_llm_factory: Optional callable (agent_name, model_name) -> chat model used for the sub-agents.
+            Defaults to the Ollama models configured in app_config.yaml.
+
+    Returns:
+        CompiledStateGraph: The compiled graph.
+    """
+    builder = StateGraph(State)
+    builder.add_edge(START, "supervisor")
+    builder.add_node("supervisor", create_supervisor_node(supervisor_llm))
+
+    # Loop through the members list to add each agent node
+    for member in members:
+        builder.add_node(member, create_agent_node(member, llm_factory=agent_llm_factory))
+    # One trace ID per invocation, also when the caller does not use start_trace().
+    compiled = traced_graph(builder.compile())
+    compiled.name = "Home Assistant"
+    return compiled
+
+graph = build_graph()
+
+# Prefetch calendar events and unread mail in the background, unless a sidecar
+# (helper_scripts/prefetch_sidecar.py) is writing the snapshot file for us.
+if PREFETCH_ENABLED and not PREFETCH_SNAPSHOT_PATH:
+    start_prefetch_scheduler()
+
+# Start syncing the default household's mail search index, so search_emails finds it ready.
+# Without MAIL_INDEX_ENABLED the sync starts on the first search_emails call.
+if MAIL_INDEX_ENABLED and MAIL_INDEX_SYNC_INTERVAL_S > 0:
+    get_mail_index()
+
+
+### For running via terminal ###
+if __name__ == "__main__":
+    ### Visualize the agent graph using Mermaid syntax ###
+    mermaid_diagram = graph.get_graph().draw_mermaid()
+    rprint("[bold cyan]Agent Graph Visualization (Mermaid):[/bold cyan]")
+    rprint(mermaid_diagram)
+    rprint("------- PASTE INTO https://mermaid.live/ -------")
+
+    input_data = {
+        "messages": [("user", "fetch all contacts")]
+    }
+
+    with start_trace():
+        for s in graph.stream(input_data, subgraphs=True):
+            rprint(Pretty(s))
+            rprint("-" * 50)
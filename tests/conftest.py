@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Run the tests from the repository root, like the app: configuration files are read
+# relative to the working directory.
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'helper_scripts'))
+os.chdir(ROOT_DIR)
@@ -0,0 +1,21 @@
+import sys
+import json
+import subprocess
+
+from conftest import ROOT_DIR
+
+
+def test_benchmark_graph_smoke(tmp_path):
+    """Every scenario runs end to end against the fake Google API and scripted models."""
+    output = tmp_path / "report.json"
+    subprocess.run(
+        [
+            sys.executable, "helper_scripts/benchmark_graph.py",
+            "--sessions", "10", "--concurrency", "2", "--warmup", "5", "--memory-sessions", "2",
+            "--output", str(output),
+        ],
+        cwd=ROOT_DIR, check=True, capture_output=True, timeout=300,
+    )
+    report = json.loads(output.read_text())
+    assert report["results"]["sessions"] == 10
+    assert report["results"]["nodes"]["supervisor"]["calls"] > 0
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from zoneinfo import ZoneInfo
+
+from tools import calendar_agent_tools
+from tools.calendar_agent_tools import IntervalSet, find_free_slots
+
+TZ = ZoneInfo("Europe/Stockholm")
+
+
+def at(hour: int, minute: int = 0, day: int = 2) -> datetime:
+    return datetime(2026, 3, day, hour, minute, tzinfo=TZ)
+
+
+def test_overlapping_and_touching_intervals_are_merged():
+    busy = IntervalSet()
+    busy.add(at(9), at(10))
+    busy.add(at(12), at(13))
+    busy.add(at(9, 30), at(11))
+    busy.add(at(11), at(12))
+    assert list(zip(busy.starts, busy.ends)) == [(at(9), at(13))]
+
+
+def test_empty_interval_is_ignored():
+    busy = IntervalSet()
+    busy.add(at(10), at(10))
+    assert busy.starts == [] and busy.ends == []
+
+
+def test_gaps_inside_window():
+    busy = IntervalSet()
+    busy.add(at(7), at(9))
+    busy.add(at(12), at(13))
+    busy.add(at(17), at(19))
+    assert busy.gaps(at(8), at(18)) == [(at(9), at(12)), (at(13), at(17))]
+    assert busy.gaps(at(14), at(15)) == [(at(14), at(15))]
+
+
+def test_find_free_slots_merges_calendars(monkeypatch):
+    response = {
+        "calendars": {
+            "family": {"busy": [{"start": "2026-03-02T08:00:00Z", "end": "2026-03-02T10:00:00Z"}]},
+            "work": {
+                "busy": [{"start": "2026-03-02T09:30:00+01:00", "end": "2026-03-02T12:00:00+01:00"}],
+                "errors": [{"reason": "notFound"}],
+            },
+        },
+    }
+    monkeypatch.setattr(calendar_agent_tools, "CALENDAR_IDS", {"family": "family", "work": "work"})
+    monkeypatch.setattr(calendar_agent_tools, "build_service", lambda *args: MagicMock())
+    monkeypatch.setattr(calendar_agent_tools, "execute_with_backoff", lambda request, api, method: response)
+
+    result = find_free_slots.invoke({
+        "start_date": "2026-03-02", "end_date": "2026-03-03", "duration_minutes": 90, "include_weekends": False,
+    })
+
+    # 08:00-09:00 is too short, Monday is busy until 12:00 local time.
+    assert result["slots"][0] == {
+        "start": at(12).isoformat(),
+        "end": at(18).isoformat(),
+        "free_minutes": 360,
+        "day_of_the_week": "Monday",
+    }
+    assert result["slots"][1]["start"] == (at(8) + timedelta(days=1)).isoformat()
+    assert len(result["slots"]) == 2
+    assert result["errors"] == {"work": [{"reason": "notFound"}]}
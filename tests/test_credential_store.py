@@ -0,0 +1,95 @@
+import json
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils import credential_store
+from utils.credential_store import CredentialStore, DEFAULT_HOUSEHOLD, token_path
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+class StubCredentials:
+    """Stands in for google.oauth2.credentials.Credentials; refresh() counts calls instead of calling Google."""
+
+    refreshes = []
+
+    def __init__(self, info):
+        self.token = info.get("token")
+        self.refresh_token = info.get("refresh_token")
+        self.expiry = datetime.fromisoformat(info["expiry"]) if info.get("expiry") else None
+
+    @classmethod
+    def from_authorized_user_info(cls, info, scopes=None):
+        return cls(info)
+
+    @property
+    def valid(self):
+        return bool(self.token) and not credential_store._expires_within(self, 0)
+
+    def refresh(self, request):
+        time.sleep(0.05)  # let the other threads pile up on the lock
+        StubCredentials.refreshes.append(self.token)
+        self.token = "refreshed"
+        self.expiry = utcnow() + timedelta(hours=1)
+
+    def to_json(self):
+        return json.dumps({"token": self.token, "refresh_token": self.refresh_token, "expiry": self.expiry.isoformat()})
+
+
+def write_token(path, token, expires_in_s):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    expiry = utcnow() + timedelta(seconds=expires_in_s)
+    path.write_text(json.dumps({"token": token, "refresh_token": "refresh", "expiry": expiry.isoformat()}))
+
+
+@pytest.fixture
+def token_file(tmp_path, monkeypatch):
+    credentials_path = tmp_path / "credentials.json"
+    credentials_path.write_text(json.dumps({"web": {"client_id": "id", "client_secret": "secret"}}))
+    token = tmp_path / "token.json"
+    monkeypatch.setattr(credential_store, "TOKEN_PATH", str(token))
+    monkeypatch.setattr(credential_store, "HOUSEHOLDS_DIR", str(tmp_path / "households"))
+    monkeypatch.setattr(credential_store, "CREDENTIALS_PATH", str(credentials_path))
+    monkeypatch.setattr(credential_store, "Credentials", StubCredentials)
+    monkeypatch.setattr(StubCredentials, "refreshes", [])
+    return token
+
+
+def test_token_path_validates_household_ids(token_file, tmp_path):
+    assert token_path(DEFAULT_HOUSEHOLD) == str(token_file)
+    assert token_path("smith-family_2") == str(tmp_path / "households" / "smith-family_2" / "token.json")
+    for household_id in ("", "..", "../other", "a/b", ".hidden", "a b"):
+        with pytest.raises(ValueError):
+            token_path(household_id)
+
+
+def test_refresh_is_skipped_when_the_token_on_disk_is_fresh(token_file):
+    store = CredentialStore(refresh_margin_s=60)
+    write_token(token_file, "expired", -10)
+    store.credentials[DEFAULT_HOUSEHOLD] = StubCredentials.from_authorized_user_info(json.loads(token_file.read_text()))
+
+    # Another process refreshed the token in the meantime.
+    write_token(token_file, "from-other-process", 3600)
+    assert store.get().token == "from-other-process"
+    assert StubCredentials.refreshes == []
+
+
+def test_concurrent_get_refreshes_once(token_file):
+    store = CredentialStore(refresh_margin_s=60)
+    write_token(token_file, "expired", -10)
+    tokens = []
+
+    threads = [threading.Thread(target=lambda: tokens.append(store.get().token)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert StubCredentials.refreshes == ["expired"]
+    assert tokens == ["refreshed"] * 8
+    assert json.loads(token_file.read_text())["token"] == "refreshed"
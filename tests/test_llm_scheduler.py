@@ -0,0 +1,128 @@
+import time
+import threading
+
+import pytest
+
+from utils import llm_scheduler
+from utils.llm_scheduler import LLMQueueFullError, LLMScheduler
+
+
+def wait_for_waiters(scheduler: LLMScheduler, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while len(scheduler.waiters) < count:
+        assert time.monotonic() < deadline, "waiters did not queue up"
+        time.sleep(0.001)
+
+
+def start_waiter(scheduler: LLMScheduler, llm_class: str, session_id: str, admitted: list) -> threading.Thread:
+    def run():
+        scheduler.acquire(llm_class, session_id)
+        admitted.append((llm_class, session_id))
+        scheduler.release()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_routing_calls_go_before_long_generations():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=8)
+    scheduler.acquire("generation", "busy")
+    admitted = []
+    threads = [start_waiter(scheduler, "long_generation", "a", admitted)]
+    wait_for_waiters(scheduler, 1)
+    threads.append(start_waiter(scheduler, "generation", "b", admitted))
+    wait_for_waiters(scheduler, 2)
+    threads.append(start_waiter(scheduler, "routing", "c", admitted))
+    wait_for_waiters(scheduler, 3)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    assert admitted == [("routing", "c"), ("generation", "b"), ("long_generation", "a")]
+
+
+def test_least_recently_served_session_goes_first():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=8)
+    scheduler.acquire("generation", "a")
+    scheduler.release()
+    scheduler.acquire("generation", "busy")
+    admitted = []
+    threads = [start_waiter(scheduler, "generation", "a", admitted)]
+    wait_for_waiters(scheduler, 1)
+    threads.append(start_waiter(scheduler, "generation", "b", admitted))
+    wait_for_waiters(scheduler, 2)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    assert admitted == [("generation", "b"), ("generation", "a")]
+
+
+def test_waiting_calls_age_past_higher_priorities(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "LLM_PRIORITY_AGING_S", 0.05)
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=8)
+    scheduler.acquire("generation", "busy")
+    admitted = []
+    threads = [start_waiter(scheduler, "long_generation", "a", admitted)]
+    wait_for_waiters(scheduler, 1)
+    time.sleep(0.2)
+    threads.append(start_waiter(scheduler, "routing", "b", admitted))
+    wait_for_waiters(scheduler, 2)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    assert admitted == [("long_generation", "a"), ("routing", "b")]
+
+
+def test_zero_aging_interval_turns_aging_off(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "LLM_PRIORITY_AGING_S", 0)
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=8)
+    scheduler.acquire("generation", "busy")
+    admitted = []
+    threads = [start_waiter(scheduler, "long_generation", "a", admitted)]
+    wait_for_waiters(scheduler, 1)
+    time.sleep(0.05)
+    threads.append(start_waiter(scheduler, "routing", "b", admitted))
+    wait_for_waiters(scheduler, 2)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    assert admitted == [("routing", "b"), ("long_generation", "a")]
+
+
+def test_calls_are_shed_when_the_queue_is_full():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+    scheduler.acquire("generation", "busy")
+    admitted = []
+    thread = start_waiter(scheduler, "generation", "a", admitted)
+    wait_for_waiters(scheduler, 1)
+
+    with pytest.raises(LLMQueueFullError):
+        scheduler.acquire("routing", "b")
+    assert scheduler.get_metrics()["by_class"]["routing"]["shed"] == 1
+
+    scheduler.release()
+    thread.join(5)
+    assert admitted == [("generation", "a")]
+
+
+def test_calls_time_out_in_the_queue():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=8, queue_timeout_s=0.05)
+    scheduler.acquire("generation", "busy")
+    with pytest.raises(LLMQueueFullError):
+        scheduler.acquire("generation", "a")
+    metrics = scheduler.get_metrics()
+    assert metrics["by_class"]["generation"]["timeouts"] == 1
+    assert metrics["queue_depth"] == 0
+
+
+def test_served_sessions_are_bounded(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "LLM_SCHEDULER_MAX_SESSIONS", 3)
+    scheduler = LLMScheduler(max_concurrency=1)
+    for session_id in ["a", "b", "c", "a", "d"]:
+        scheduler.acquire("generation", session_id)
+        scheduler.release()
+    assert list(scheduler.last_served) == ["c", "a", "d"]
@@ -0,0 +1,64 @@
+from utils.mail_index import MailIndex, tokenize
+
+EMAILS = [
+    {"id": "1", "from": "Daycare <billing@daycare.example>", "subject": "Invoice for March",
+     "snippet": "", "body": "Please find the daycare invoice attached."},
+    {"id": "2", "from": "Anna <anna@example.com>", "subject": "Dinner on Sunday",
+     "snippet": "", "body": "Shall we have dinner at ours? I can bring the invoice for the boat."},
+    {"id": "3", "from": "News <news@example.com>", "subject": "Weekly newsletter",
+     "snippet": "", "body": "Local models, new releases and more."},
+]
+
+
+def build_index(path: str = "") -> MailIndex:
+    index = MailIndex(path)
+    for email in EMAILS:
+        index.add(email)
+    return index
+
+
+def test_tokenize_drops_stopwords_and_short_tokens():
+    assert tokenize("The invoice for my daycare, a B") == ["invoice", "daycare"]
+
+
+def test_bm25_ranks_subject_and_sender_matches_first():
+    results = build_index().search("daycare invoice")
+    assert [result["id"] for result in results] == ["1", "2"]
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_unknown_terms_return_nothing():
+    assert build_index().search("spaceship") == []
+
+
+def test_removed_email_is_not_found():
+    index = build_index()
+    index.remove("1")
+    assert [result["id"] for result in index.search("invoice")] == ["2"]
+    assert "daycare" not in index.postings
+
+
+def test_index_log_is_appended_and_replayed(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = build_index(path)
+    index.save()
+    index.remove("3")
+    index.save()
+    with open(path) as f:
+        assert len(f.readlines()) == 4
+
+    reloaded = MailIndex(path)
+    assert len(reloaded) == 2
+    assert reloaded.search("daycare invoice") == index.search("daycare invoice")
+
+
+def test_truncated_log_is_compacted(tmp_path):
+    path = tmp_path / "index.jsonl"
+    index = build_index(str(path))
+    index.save()
+    with open(path, "a") as f:
+        f.write('{"id": "4", "fro')
+
+    reloaded = MailIndex(str(path))
+    assert len(reloaded) == 3
+    assert len(path.read_text().splitlines()) == 3
@@ -0,0 +1,98 @@
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from tools.meal_planner_agent_tools import normalize_ingredient, parse_recipes, solve_meal_plan
+
+ROWS = [
+    ["name", "ingredients"],
+    ["Puttanesca", "spaghetti, 400 g canned tomatoes, olives, capers, garlic, anchovies"],
+    ["Salmon bowl", "salmon, rice, cucumber, radishes"],
+    ["Fish Tacos", "cod, tortillas, cabbage, limes"],
+    ["Chicken curry", "chicken breast, rice, onions, garlic, coconut milk"],
+    ["Beef tacos", "beef mince, tortillas, tomatoes, onions"],
+    ["Pork stew", "pork, potatoes, onions, carrots"],
+    ["Bean soup", "white beans, canned tomatoes, onions, garlic, carrots"],
+    ["Veggie stir fry", "rice, broccoli, peppers, garlic, peaches"],
+    ["puttanesca", "duplicate row"],
+]
+MONDAY = date(2026, 3, 2)
+
+
+@pytest.mark.parametrize("ingredient, expected", [
+    ("2 Carrots", "carrot"),
+    ("400 g canned tomatoes", "canned tomato"),
+    ("radishes", "radish"),
+    ("peaches", "peach"),
+    ("boxes", "box"),
+    ("glasses", "glass"),
+    ("anchovies", "anchovy"),
+    ("bay leaves", "bay leaf"),
+    ("quiches", "quiche"),
+    ("hummus", "hummus"),
+])
+def test_normalize_ingredient(ingredient, expected):
+    assert normalize_ingredient(ingredient) == expected
+
+
+def test_parse_recipes_skips_header_and_duplicates():
+    recipes = parse_recipes(ROWS)
+    assert [recipe["name"] for recipe in recipes][:2] == ["Puttanesca", "Salmon bowl"]
+    assert len(recipes) == 8
+
+
+def test_plan_respects_constraints():
+    result = solve_meal_plan(parse_recipes(ROWS), MONDAY, 7, required=["Bean soup"])
+    meals = [day["meal"] for day in result["plan"]]
+    assert len(meals) == 7 and len(set(meals)) == 7
+    assert "Bean soup" in meals
+    assert result["plan"][6]["weekday"] == "Sunday"
+    assert meals[6] in {"Puttanesca", "Salmon bowl", "Fish Tacos"}
+    assert sum(meal in {"Chicken curry", "Beef tacos", "Pork stew"} for meal in meals) <= 2
+    assert result["warnings"] == []
+
+
+def test_shopping_list_is_consolidated():
+    result = solve_meal_plan(parse_recipes(ROWS), MONDAY, 7)
+    used = Counter(ingredient for day in result["plan"] for ingredient in day["ingredients"])
+    assert result["shopping_list"] == [{"ingredient": name, "meals": count} for name, count in sorted(used.items())]
+
+
+def test_excluding_fish_excludes_every_fish_dish():
+    result = solve_meal_plan(parse_recipes(ROWS), MONDAY, 5, exclude=["fish"], fish_on_sundays=False)
+    meals = {day["meal"] for day in result["plan"]}
+    assert not meals & {"Puttanesca", "Salmon bowl", "Fish Tacos"}
+
+
+@pytest.mark.parametrize("exclude, excluded_meals", [
+    ("Tomatoes", {"Puttanesca", "Beef tacos", "Bean soup"}),
+    ("beef", {"Beef tacos"}),
+    ("chicken", {"Chicken curry"}),
+])
+def test_excluding_an_ingredient_matches_its_variants(exclude, excluded_meals):
+    # Requiring the meals would plan them if they were not excluded.
+    result = solve_meal_plan(parse_recipes(ROWS), MONDAY, 7, exclude=[exclude], required=sorted(excluded_meals))
+    meals = {day["meal"] for day in result["plan"]}
+    assert not meals & excluded_meals
+
+
+def test_meat_limit_is_relaxed_before_meals_repeat():
+    recipes = [recipe for recipe in parse_recipes(ROWS) if recipe["name"] != "Veggie stir fry"]
+    result = solve_meal_plan(recipes, MONDAY, 7, exclude=["fish", "Bean soup"], fish_on_sundays=False)
+    meals = [day["meal"] for day in result["plan"]]
+    # Only the three meat dishes are left: the third one exceeds the limit instead of a repeat.
+    assert len(set(meals[:3])) == 3
+    assert result["warnings"][0] == "2026-03-04: more than 2 meat dinners this week."
+    assert result["warnings"][1] == "2026-03-05: more than 2 meat dinners this week and a meal is repeated within 7 days."
+
+
+def test_repeat_without_meat_is_reported_as_a_repeat_only():
+    recipes = [recipe for recipe in parse_recipes(ROWS) if recipe["name"] in ("Veggie stir fry", "Bean soup")]
+    result = solve_meal_plan(recipes, MONDAY, 3)
+    assert result["warnings"] == ["2026-03-04: a meal is repeated within 7 days."]
+
+
+def test_unknown_required_recipe_is_reported():
+    result = solve_meal_plan(parse_recipes(ROWS), MONDAY, 2, required=["Lasagna"])
+    assert result["warnings"][0] == "Required recipe 'Lasagna' is not in the catalog or is excluded."
@@ -0,0 +1,71 @@
+from utils import outbox as outbox_module
+from utils.outbox import Outbox
+
+
+def test_duplicate_send_returns_the_existing_message(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    first = outbox.enqueue("send", "peter@example.com", "Hi", "Hello!")
+    outbox.mark_sent(first["tracking_id"], "gmail-id")
+
+    second = outbox.enqueue("send", " Peter@example.com", "Hi", "Hello! ")
+    assert second["deduplicated"] is True
+    assert second["tracking_id"] == first["tracking_id"]
+    assert second["status"] == "sent"
+    assert first["tracking_id"] in second["note"]
+
+
+def test_sending_message_is_reclaimed_only_after_its_lease(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_module, "OUTBOX_SEND_LEASE_S", 60)
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    tracking_id = outbox.enqueue("send", "peter@example.com", "Hi", "Hello!")["tracking_id"]
+    assert [m["id"] for m in outbox.claim_batch()] == [tracking_id]
+
+    # A restart while the lease is held does not deliver the message a second time.
+    outbox = Outbox(path)
+    assert outbox.claim_batch() == []
+
+    monkeypatch.setattr(outbox_module.time, "time", lambda: 10 ** 10)
+    reclaimed = outbox.claim_batch()
+    assert [m["id"] for m in reclaimed] == [tracking_id]
+    assert reclaimed[0]["attempts"] == 1
+
+
+def test_expired_lease_without_attempts_left_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_module, "OUTBOX_MAX_ATTEMPTS", 1)
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    tracking_id = outbox.enqueue("send", "peter@example.com", "Hi", "Hello!")["tracking_id"]
+    outbox.claim_batch()
+
+    monkeypatch.setattr(outbox_module.time, "time", lambda: 10 ** 10)
+    assert outbox.claim_batch() == []
+    assert outbox.status(tracking_id)[0]["status"] == "failed"
+
+
+def deliver_failing_with(error, tmp_path, monkeypatch):
+    import tools.email_agent_tools as email_tools
+
+    def deliver_email(kind, to_email, subject, body):
+        raise error
+
+    monkeypatch.setattr(email_tools, "deliver_email", deliver_email)
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    tracking_id = outbox.enqueue("send", "peter@example.com", "Hi", "Hello!")["tracking_id"]
+    outbox_module.OutboxWorker(outbox)._deliver(outbox.claim_batch()[0])
+    return outbox.status(tracking_id)[0]
+
+
+def test_send_is_not_requeued_after_server_error(tmp_path, monkeypatch):
+    from test_rate_limiter import http_error
+
+    message = deliver_failing_with(http_error(500), tmp_path, monkeypatch)
+    assert message["status"] == "failed"
+    assert "check the Sent folder" in message["error"]
+
+
+def test_rate_limited_send_is_requeued(tmp_path, monkeypatch):
+    from test_rate_limiter import http_error
+
+    message = deliver_failing_with(http_error(429), tmp_path, monkeypatch)
+    assert message["status"] == "queued"
+    assert message["attempts"] == 1
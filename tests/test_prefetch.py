@@ -0,0 +1,27 @@
+import time
+from datetime import datetime
+
+from utils.prefetch import PrefetchCache, build_digest
+
+
+def snapshot(fetched_at: float) -> dict:
+    return {"fetched_at": fetched_at, "events": [], "unread": [], "digest": ""}
+
+
+def test_invalidated_part_is_not_served_until_next_refresh():
+    cache = PrefetchCache(snapshot_path="")
+    cache.update(snapshot(time.time()))
+    cache.invalidate("events")
+    assert cache.get("events") is None
+    assert cache.get("unread") is not None
+    assert cache.get("events", "unread") is None
+
+    cache.update(snapshot(time.time() + 1))
+    assert cache.get("events") is not None
+
+
+def test_digest_groups_events_by_stockholm_day():
+    events = [{"start": {"dateTime": "2026-03-01T23:30:00Z"}, "summary": "Late call", "calendarId": "x"}]
+    digest = build_digest(events, [], datetime(2026, 3, 1))
+    assert "Monday 2026-03-02:" in digest
+    assert "  - 00:30 Late call [x]" in digest
@@ -0,0 +1,62 @@
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from utils.rate_limiter import RateLimiter, execute_with_backoff, is_retryable
+
+
+def http_error(status: int, reason: str = None) -> HttpError:
+    errors = [{"reason": reason}] if reason else []
+    content = json.dumps({"error": {"code": status, "message": "error", "errors": errors}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+class FailingRequest:
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise self.error
+        return {"id": "ok"}
+
+
+@pytest.mark.parametrize("error, idempotent, expected", [
+    (http_error(429), True, True),
+    (http_error(429), False, True),
+    (http_error(403, "userRateLimitExceeded"), False, True),
+    (http_error(503), True, True),
+    (http_error(503), False, False),
+    (ConnectionError(), True, True),
+    (ConnectionError(), False, False),
+    (http_error(403, "forbidden"), True, False),
+    (http_error(400), True, False),
+])
+def test_is_retryable(error, idempotent, expected):
+    assert is_retryable(error, idempotent) is expected
+
+
+def test_send_is_not_retried_after_server_error(monkeypatch):
+    monkeypatch.setattr("utils.rate_limiter.time.sleep", lambda s: None)
+    request = FailingRequest(http_error(500))
+    with pytest.raises(HttpError):
+        execute_with_backoff(request, "gmail", "messages.send", limiter=RateLimiter())
+    assert request.calls == 1
+
+
+def test_send_is_retried_when_rate_limited(monkeypatch):
+    monkeypatch.setattr("utils.rate_limiter.time.sleep", lambda s: None)
+    request = FailingRequest(http_error(429))
+    assert execute_with_backoff(request, "gmail", "messages.send", limiter=RateLimiter()) == {"id": "ok"}
+    assert request.calls == 2
+
+
+def test_read_is_retried_after_server_error(monkeypatch):
+    monkeypatch.setattr("utils.rate_limiter.time.sleep", lambda s: None)
+    request = FailingRequest(http_error(503))
+    assert execute_with_backoff(request, "gmail", "messages.list", limiter=RateLimiter()) == {"id": "ok"}
+    assert request.calls == 2
@@ -0,0 +1,68 @@
+import inspect
+import threading
+import time
+
+import pytest
+from langchain_core.tools import tool
+
+from utils.singleflight import SingleFlight, call_key, coalesced_tool
+
+
+def get_single_contact(query: str, max_results: int = 5):
+    return query, max_results
+
+
+def test_call_key_fills_defaults_and_normalizes_whitespace():
+    signature = inspect.signature(get_single_contact)
+    assert call_key("get_single_contact", signature, ("peter",), {}) == \
+        call_key("get_single_contact", signature, (), {"query": " peter ", "max_results": 5})
+    assert call_key("get_single_contact", signature, ("peter",), {}) != \
+        call_key("get_single_contact", signature, ("anna",), {})
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"contacts": ["peter"]}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(single_flight.do(("get_contacts", "default", "{}"), fetch)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    while single_flight.get_metrics().get("get_contacts", {}).get("calls", 0) < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(coalesced for _, coalesced in results) == [False, True, True, True, True]
+    assert all(result == {"contacts": ["peter"]} for result, _ in results)
+    # Followers get copies, a caller mutating its result does not affect the others.
+    assert len({id(result) for result, _ in results}) == 5
+    assert single_flight.get_metrics()["get_contacts"] == {"calls": 5, "coalesced": 4, "executed": 1}
+
+
+def test_errors_are_shared_and_not_cached():
+    single_flight = SingleFlight()
+    with pytest.raises(RuntimeError):
+        single_flight.do(("check_emails", "default", "{}"), lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert single_flight.do(("check_emails", "default", "{}"), lambda: "ok") == ("ok", False)
+
+
+def test_write_tools_cannot_be_coalesced():
+    @tool
+    def send_email(to_email: str) -> str:
+        """Send an email."""
+        return to_email
+
+    with pytest.raises(ValueError):
+        coalesced_tool(send_email)
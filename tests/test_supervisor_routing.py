@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from agents.supervisor import parse_routing_output
+
+ROUTE = {
+    "next": "calendar_agent",
+    "task_description_for_agent": "List the events of the coming week.",
+    "message_completion_summary": "",
+}
+
+
+def test_valid_output_is_not_repaired():
+    assert parse_routing_output(json.dumps(ROUTE)) == (ROUTE, False)
+
+
+@pytest.mark.parametrize("text", [
+    "<think>The user wants the calendar.</think>" + json.dumps(ROUTE),
+    "```json\n" + json.dumps(ROUTE) + "\n```",
+    "Here is my answer: " + json.dumps(ROUTE) + " Hope this helps.",
+])
+def test_think_tags_fences_and_prose_are_stripped(text):
+    assert parse_routing_output(text) == (ROUTE, True)
+
+
+def test_unclosed_think_section_is_rejected():
+    assert parse_routing_output("<think>The user wants " + json.dumps(ROUTE)) == (None, True)
+
+
+@pytest.mark.parametrize("raw_next, expected", [
+    ("calendar", "calendar_agent"),
+    ("Calendar_Agent", "calendar_agent"),
+    ("finish", "FINISH"),
+])
+def test_loose_agent_names_are_accepted(raw_next, expected):
+    route, repaired = parse_routing_output(json.dumps({**ROUTE, "next": raw_next}))
+    assert route["next"] == expected
+    assert repaired
+
+
+def test_unknown_agent_is_rejected():
+    assert parse_routing_output(json.dumps({**ROUTE, "next": "travel_agent"})) == (None, True)
+
+
+def test_missing_closing_brace_is_repaired():
+    assert parse_routing_output(json.dumps(ROUTE)[:-1]) == (ROUTE, True)
+
+
+@pytest.mark.parametrize("text", [
+    # Cut off inside the task description.
+    '{"next": "calendar_agent", "task_description_for_agent": "List the events of',
+    # Cut off after a key.
+    '{"next": "calendar_agent", "task_description_for_agent":',
+    # Cut off before the remaining keys.
+    '{"next": "calendar_agent", ',
+])
+def test_output_cut_off_in_or_before_a_value_is_rejected(text):
+    assert parse_routing_output(text) == (None, True)
+
+
+@pytest.mark.parametrize("data", [
+    {"next": "calendar_agent"},
+    {**ROUTE, "task_description_for_agent": " "},
+])
+def test_delegation_without_a_task_is_rejected(data):
+    assert parse_routing_output(json.dumps(data)) == (None, True)
+
+
+def test_finish_without_a_task_is_accepted():
+    route, _ = parse_routing_output(json.dumps({"next": "FINISH", "message_completion_summary": "Done."}))
+    assert route == {"next": "FINISH", "task_description_for_agent": "", "message_completion_summary": "Done."}
+
+
+def test_router_retries_truncated_output():
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from agents.supervisor import create_router
+
+    llm = FakeListChatModel(responses=['{"next": "calendar_agent", "task_description_for_agent": "List', json.dumps(ROUTE)])
+    route = create_router(llm, routing_mode="constrained")
+    assert route([{"role": "user", "content": "summarize my week"}]) == ROUTE
+
+
+def test_supervisor_sends_only_its_prompt_as_system_message(monkeypatch):
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langchain_core.messages import HumanMessage
+    import agents.supervisor as supervisor
+
+    class RecordPrompts(BaseCallbackHandler):
+        prompts = []
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            self.prompts.extend(messages)
+
+    monkeypatch.setattr(supervisor, "get_digest", lambda: "2 unread emails")
+    llm = FakeListChatModel(responses=[json.dumps(ROUTE)], callbacks=[RecordPrompts()])
+    node = supervisor.create_supervisor_node(llm, routing_mode="constrained")
+    command = node({"messages": [HumanMessage(content="summarize my week")]})
+
+    prompt = RecordPrompts.prompts[0]
+    assert [m.type for m in prompt] == ["system", "human", "human", "human"]
+    assert "2 unread emails" in prompt[2].content
+    # The task description joins the history as a user message too.
+    instruction = command.update["messages"][0]
+    assert (instruction.type, instruction.name) == ("human", "supervisor")
@@ -0,0 +1,36 @@
+from typing import TypedDict
+
+from langgraph.graph import StateGraph, START, END
+
+import utils.tracing as tracing
+
+
+class State(TypedDict):
+    steps: int
+
+
+def build_two_node_graph():
+    builder = StateGraph(State)
+    builder.add_node("first", tracing.traced_node("first", lambda state: {"steps": state["steps"] + 1}))
+    builder.add_node("second", tracing.traced_node("second", lambda state: {"steps": state["steps"] + 1}))
+    builder.add_edge(START, "first")
+    builder.add_edge("first", "second")
+    builder.add_edge("second", END)
+    return tracing.traced_graph(builder.compile())
+
+
+def test_each_invocation_gets_its_own_trace_without_start_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_EXPORTER", "jsonl")
+    monkeypatch.setattr(tracing, "TRACE_PATH", str(tmp_path / "spans.jsonl"))
+    graph = build_two_node_graph()
+    config = {"configurable": {"thread_id": "same-thread"}}
+
+    graph.invoke({"steps": 0}, config)
+    graph.invoke({"steps": 0}, config)
+
+    spans = tracing.load_spans()
+    assert [s["name"] for s in spans] == ["first", "second", "first", "second"]
+    first_run, second_run = {s["trace_id"] for s in spans[:2]}, {s["trace_id"] for s in spans[2:]}
+    assert len(first_run) == 1 and len(second_run) == 1
+    assert first_run != second_run
+    assert not tracing.GRAPH_RUN_TRACKER.roots
@@ -1,12 +1,15 @@
 # tools/calendar.py
 import os
-from datetime import datetime, timezone
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, time, timezone
+from zoneinfo import ZoneInfo
 import pytz
 from dotenv import load_dotenv
 from langchain_core.tools import tool
 from typing import Any
-from googleapiclient.discovery import build
-from utils.google_auth import load_auth_client
+from utils.google_service import build_service
+from utils.rate_limiter import execute_with_backoff
+from utils.prefetch import get_cached_events, invalidate_prefetch
 
 load_dotenv()
 
@@ -105,6 +108,62 @@ def format_datetime(dt: datetime) -> str:
     # Convert to ISO format and replace '+00:00' with 'Z'
     return dt.isoformat().replace("+00:00", "Z")
 
+def get_event_end(event: dict) -> datetime:
+    """
+    Extract the event's end time as a timezone-aware datetime object, using the same rules as get_event_start.
+
+    Args:
+        event (dict): The parsed event dictionary.
+
+    Returns:
+        datetime: A timezone-aware datetime object representing the event's end time.
+    """
+    return get_event_start({'start': event.get('end') or {}})
+
+def fetch_calendar_events(time_min: str, time_max: str = None, max_results: int = 50, all_pages: bool = False) -> list:
+    """
+    Fetch and parse events from all calendars in CALENDAR_IDS, sorted by start time.
+
+    Args:
+        time_min (str): RFC3339 lower bound.
+        time_max (str, optional): RFC3339 upper bound.
+        max_results (int): Page size per calendar.
+        all_pages (bool): Follow nextPageToken until every event in the range is fetched.
+
+    Returns:
+        list: A list of parsed event dictionaries.
+    """
+    service = build_service("calendar", "v3")
+    all_events = []
+
+    # Loop through each calendar defined in CALENDAR_IDS.
+    for calendar_name, calendar_id in CALENDAR_IDS.items():
+        page_token = None
+        while True:
+            request = service.events().list(
+                calendarId=calendar_id,
+                timeMin=time_min,
+                timeMax=time_max,
+                timeZone='Europe/Stockholm',
+                maxResults=max_results,
+                singleEvents=True,
+                orderBy='startTime',
+                pageToken=page_token
+            )
+            response = execute_with_backoff(request, "calendar", "events.list")
+
+            items = response.get('items', [])
+            # Parse each event into a simplified dictionary.
+            all_events.extend(parse_event(event, calendar_id) for event in items)
+
+            page_token = response.get('nextPageToken')
+            if not all_pages or not page_token:
+                break
+
+    # Sort all events by their start time.
+    all_events.sort(key=get_event_start)
+    return all_events
+
 @tool
 def get_calendar_events(start_date: str = None, end_date: str = None) -> list:
     """
@@ -118,10 +177,6 @@ def get_calendar_events(start_date: str = None, end_date: str = None) -> list:
         list: A list of parsed event dictionaries.
     """
     try:
-        # Load authorized credentials and build the Calendar service.
-        creds = load_auth_client()
-        service = build('calendar', 'v3', credentials=creds)
-
         # Prepare timeMin and timeMax in RFC3339 format (UTC).
         if start_date:
             dt_start = datetime.fromisoformat(start_date)
@@ -134,29 +189,12 @@ def get_calendar_events(start_date: str = None, end_date: str = None) -> list:
             dt_end = datetime.fromisoformat(end_date)
             time_max = format_datetime(dt_end)
 
-        all_events = []
-
-        # Loop through each calendar defined in CALENDAR_IDS.
-        for calendar_name, calendar_id in CALENDAR_IDS.items():
-            response = service.events().list(
-                calendarId=calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                timeZone='Europe/Stockholm',
-                maxResults=50,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-
-            items = response.get('items', [])
-            # Parse each event into a simplified dictionary.
-            events = [parse_event(event, calendar_id) for event in items]
-
-            all_events.extend(events)
+        # Serve from the background prefetch when it covers the requested range.
+        cached_events = get_cached_events(time_min, time_max)
+        if cached_events is not None:
+            return cached_events
 
-        # Sort all events by their start time.
-        all_events.sort(key=get_event_start)
-        return all_events
+        return fetch_calendar_events(time_min, time_max)
 
     except Exception as error:
         print(error)
@@ -195,15 +233,131 @@ def add_calendar_event(startDate: datetime, endDate: datetime, calendar_name: st
         }
     }
 
-    creds = load_auth_client()
-    service = build('calendar', 'v3', credentials=creds)
+    service = build_service("calendar", "v3")
 
     try:
-        created_event = service.events().insert(
+        request = service.events().insert(
             calendarId=calendar_id,
             body=event
-        ).execute()
+        )
+        created_event = execute_with_backoff(request, "calendar", "events.insert")
+        invalidate_prefetch("events")
         return created_event
     except Exception as e:
         print("Error creating event:", e)
-        raise
\ No newline at end of file
+        raise
+
+class IntervalSet:
+    """
+    A set of disjoint, sorted [start, end) intervals. Overlapping or touching
+    intervals are merged on insert, so lookups stay a binary search.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def add(self, start: datetime, end: datetime) -> None:
+        if end <= start:
+            return
+        # Intervals that overlap or touch [start, end) are merged into it.
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def gaps(self, window_start: datetime, window_end: datetime) -> list:
+        """Return the free (start, end) gaps inside a window."""
+        free = []
+        cursor = window_start
+        i = bisect_right(self.ends, window_start)
+        while i < len(self.starts) and self.starts[i] < window_end:
+            if self.starts[i] > cursor:
+                free.append((cursor, self.starts[i]))
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+        return free
+
+def parse_local_datetime(value: str, end_of_day: bool = False) -> datetime:
+    """
+    Parse an ISO date or datetime string into a Europe/Stockholm datetime. Naive values are
+    interpreted as local time. For a date-only value with end_of_day=True, the end of that day is returned.
+    """
+    stockholm_tz = ZoneInfo("Europe/Stockholm")
+    dt = datetime.fromisoformat(value)
+    if end_of_day and len(value) <= 10:
+        dt = dt + timedelta(days=1)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=stockholm_tz)
+    return dt.astimezone(stockholm_tz)
+
+@tool
+def find_free_slots(start_date: str, end_date: str, duration_minutes: int = 60, work_day_start: str = "08:00", work_day_end: str = "18:00", include_weekends: bool = True, max_slots: int = 10) -> dict:
+    """
+    Finds time slots where all calendars are free, using a single freeBusy query.
+
+    Args:
+        start_date (str): Start of the search range (ISO date or datetime).
+        end_date (str): End of the search range (ISO date or datetime, date-only is inclusive).
+        duration_minutes (int): Minimum length of a free slot.
+        work_day_start (str): Start of the daily window, "HH:MM".
+        work_day_end (str): End of the daily window, "HH:MM".
+        include_weekends (bool): If False, Saturdays and Sundays are skipped.
+        max_slots (int): Maximum number of slots to return.
+
+    Returns:
+        dict: The free slots (start, end, free_minutes, day_of_the_week), earliest first.
+    """
+    stockholm_tz = ZoneInfo("Europe/Stockholm")
+    range_start = parse_local_datetime(start_date)
+    range_end = parse_local_datetime(end_date, end_of_day=True)
+    day_start = time.fromisoformat(work_day_start)
+    day_end = time.fromisoformat(work_day_end)
+    calendar_ids = [calendar_id for calendar_id in CALENDAR_IDS.values() if calendar_id]
+
+    service = build_service("calendar", "v3")
+    request = service.freebusy().query(body={
+        "timeMin": format_datetime(range_start.astimezone(timezone.utc)),
+        "timeMax": format_datetime(range_end.astimezone(timezone.utc)),
+        "timeZone": "Europe/Stockholm",
+        "items": [{"id": calendar_id} for calendar_id in calendar_ids],
+    })
+    response = execute_with_backoff(request, "calendar", "freebusy.query")
+
+    # Merge the busy intervals of every calendar, normalized to Europe/Stockholm.
+    busy = IntervalSet()
+    errors = {}
+    for calendar_id, calendar in response.get("calendars", {}).items():
+        if calendar.get("errors"):
+            errors[calendar_id] = calendar["errors"]
+        for interval in calendar.get("busy", []):
+            start = get_event_start({"start": {"dateTime": interval["start"]}}).astimezone(stockholm_tz)
+            end = get_event_start({"start": {"dateTime": interval["end"]}}).astimezone(stockholm_tz)
+            busy.add(start, end)
+
+    slots = []
+    min_length = timedelta(minutes=duration_minutes)
+    day = range_start.date()
+    while day <= range_end.date() and len(slots) < max_slots:
+        if include_weekends or day.weekday() < 5:
+            window_start = max(range_start, datetime.combine(day, day_start, tzinfo=stockholm_tz))
+            window_end = min(range_end, datetime.combine(day, day_end, tzinfo=stockholm_tz))
+            for free_start, free_end in busy.gaps(window_start, window_end):
+                if free_end - free_start >= min_length:
+                    slots.append({
+                        "start": free_start.isoformat(),
+                        "end": free_end.isoformat(),
+                        "free_minutes": int((free_end - free_start).total_seconds() // 60),
+                        "day_of_the_week": free_start.strftime("%A"),
+                    })
+        day += timedelta(days=1)
+
+    result = {"slots": slots[:max_slots]}
+    if errors:
+        result["errors"] = errors
+    return result
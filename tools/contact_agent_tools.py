@@ -1,9 +1,9 @@
 import os
 import json
-from googleapiclient.discovery import build
 from dotenv import load_dotenv
 from langchain_core.tools import tool
-from utils.google_auth import load_auth_client
+from utils.google_service import build_service
+from utils.rate_limiter import execute_with_backoff
 
 load_dotenv()
 
@@ -14,21 +14,18 @@ def get_contacts():
     """
     Fetches recipes from Google Sheets using user OAuth (NOT a service account).
     """
-    # 1) Check if we already have a valid token stored in token.json
-    # Use from_authorized_user_info() because combined_info is a dictionary.
-    creds = load_auth_client()
-
-    # 4) Build the Sheets API client with our valid creds
-    service = build("sheets", "v4", credentials=creds)
+    # 1) Build the Sheets API client (credentials of the current household, see utils/credential_store.py)
+    service = build_service("sheets", "v4")
     sheet = service.spreadsheets()
 
-    # 5) Read data from the sheet
+    # 2) Read data from the sheet
     READ_RANGE = "contacts!A1:B3"
 
-    result = sheet.values().get(
+    request = sheet.values().get(
         spreadsheetId=CONTACT_GOOGLE_SHEET,
         range=READ_RANGE
-    ).execute()
+    )
+    result = execute_with_backoff(request, "sheets", "values.get")
     
     rows = result.get("values", [])
 
@@ -45,20 +42,18 @@ def get_single_contact(query: str):
     Returns:
         dict: The contact details if found or an informative message.
     """
-    # 1) Obtain valid credentials
-    creds = load_auth_client()
-
-    # 2) Build the Sheets API client
-    service = build("sheets", "v4", credentials=creds)
+    # 1) Build the Sheets API client (credentials of the current household, see utils/credential_store.py)
+    service = build_service("sheets", "v4")
     sheet = service.spreadsheets()
 
-    # 3) Read the full range of contacts.
+    # 2) Read the full range of contacts.
     # Adjust the range if you have more rows. Here we assume the data starts at A1.
     READ_RANGE = "contacts!A1:B"
-    result = sheet.values().get(
+    request = sheet.values().get(
         spreadsheetId=CONTACT_GOOGLE_SHEET,
         range=READ_RANGE
-    ).execute()
+    )
+    result = execute_with_backoff(request, "sheets", "values.get")
     rows = result.get("values", [])
     
     if not rows:
@@ -6,10 +6,14 @@ import base64
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from googleapiclient.errors import HttpError
-from googleapiclient.discovery import build
 from dotenv import load_dotenv
 from langchain_core.tools import tool
-from utils.google_auth import load_auth_client
+from utils.google_service import build_service
+from utils.rate_limiter import execute_with_backoff
+from utils.prefetch import get_cached_emails, invalidate_prefetch
+from utils.mail_index import get_mail_index
+from utils.outbox import OUTBOX_ENABLED, enqueue_email, get_outbox
+from utils.credential_store import get_household_id
 
 load_dotenv()
 
@@ -46,10 +50,31 @@ def create_message(sender: str, to: str, subject: str, message_text: str) -> dic
     raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
     return {'raw': raw_message}
 
+def deliver_email(kind: str, to_email: str, subject: str, body: str) -> dict:
+    """
+    Sends an email ("send") or stores a draft ("draft") through the Gmail API right away.
+    Used by the outbox worker, and directly by the tools when OUTBOX_ENABLED is false.
+
+    Returns:
+        dict: The sent message or the created draft.
+    """
+    service = build_service("gmail", "v1")
+    sender = "me"
+    message = create_message(sender, to_email, subject, body)
+    if kind == "draft":
+        # Create a draft from the message and store it in drafts
+        request = service.users().drafts().create(userId="me", body={"message": message})
+        return execute_with_backoff(request, "gmail", "drafts.create")
+    request = service.users().messages().send(userId="me", body=message)
+    sent_message = execute_with_backoff(request, "gmail", "messages.send")
+    # A message to ourselves shows up as unread mail.
+    invalidate_prefetch("unread")
+    return sent_message
+
 @tool
 def send_email(to_email: str, subject: str, body: str) -> dict:
     """
-    Sends an email using the Gmail API.
+    Sends an email using the Gmail API. The email is queued in the outbox and sent in the background.
     
     Args:
         to_email (str): Recipient's email address.
@@ -57,14 +82,13 @@ def send_email(to_email: str, subject: str, body: str) -> dict:
         body (str): Body text of the email.
     
     Returns:
-        dict: API response data or error information.
+        dict: A tracking_id and status (use get_outbox_status to follow delivery), or error information.
+            When an identical message was queued recently, deduplicated is True and a note says so.
     """
     try:
-        creds = load_auth_client()
-        service = build("gmail", "v1", credentials=creds)
-        sender = "me"
-        message = create_message(sender, to_email, subject, body)
-        sent_message = service.users().messages().send(userId="me", body=message).execute()
+        if OUTBOX_ENABLED:
+            return enqueue_email("send", to_email, subject, body)
+        sent_message = deliver_email("send", to_email, subject, body)
         print("Message sent successfully. Message Id:", sent_message.get("id"))
         return sent_message
     except HttpError as error:
@@ -125,6 +149,59 @@ def get_message_body(payload: dict) -> str:
     
     return ""
 
+def get_header(payload: dict, name: str) -> str:
+    """
+    Returns the value of a header (e.g. "Subject", "From") from a Gmail message payload.
+    """
+    for header in payload.get("headers", []):
+        if header.get("name", "").lower() == name.lower():
+            return header.get("value", "")
+    return ""
+
+def fetch_email(service, message_id: str) -> dict:
+    """
+    Downloads a single email and extracts its headers and cleaned body.
+
+    Args:
+        service: A Gmail API client from build_service("gmail", "v1").
+        message_id (str): The ID of the email message.
+
+    Returns:
+        dict: The email with id, from, subject, snippet, labelIds and cleaned body.
+    """
+    request = service.users().messages().get(userId="me", id=message_id, format="full")
+    msg_detail = execute_with_backoff(request, "gmail", "messages.get")
+    payload = msg_detail.get("payload", {})
+    return {
+        "id": msg_detail.get("id"),
+        "from": get_header(payload, "From"),
+        "subject": get_header(payload, "Subject"),
+        "snippet": msg_detail.get("snippet", ""),
+        "labelIds": msg_detail.get("labelIds", []),
+        "body": get_message_body(payload)
+    }
+
+def fetch_emails(query: str, max_results: int) -> list:
+    """
+    Lists the emails matching a Gmail search query and downloads each of them.
+
+    Args:
+        query (str): Gmail search query.
+        max_results (int): Maximum number of emails to retrieve.
+
+    Returns:
+        list: Emails with id, from, subject, snippet, labelIds and cleaned body.
+    """
+    service = build_service("gmail", "v1")
+    request = service.users().messages().list(userId="me", q=query, maxResults=max_results)
+    results = execute_with_backoff(request, "gmail", "messages.list")
+    messages = results.get("messages", [])
+    email_list = []
+
+    for msg in messages:
+        email_list.append(fetch_email(service, msg["id"]))
+    return email_list
+
 @tool
 def check_emails(query: str = "", max_results: int = 10, only_unlabeled: bool = False) -> dict:
     """
@@ -137,33 +214,43 @@ def check_emails(query: str = "", max_results: int = 10, only_unlabeled: bool =
         only_unlabeled (bool): If True, only return emails with no user-applied labels.
     
     Returns:
-        dict: A dictionary containing a list of emails with details including id, snippet, labelIds, and cleaned body.
+        dict: A dictionary containing a list of emails with details including id, from, subject, snippet, labelIds, and cleaned body.
     """
     try:
         # Append "has:nouserlabels" to the query if only_unlabeled is True
         if only_unlabeled:
             query = (query + " " if query else "") + "has:nouserlabels"
-        
-        creds = load_auth_client()
-        service = build("gmail", "v1", credentials=creds)
-        results = service.users().messages().list(userId="me", q=query, maxResults=max_results).execute()
-        messages = results.get("messages", [])
-        email_list = []
-        
-        for msg in messages:
-            msg_detail = service.users().messages().get(userId="me", id=msg["id"], format="full").execute()
-            payload = msg_detail.get("payload", {})
-            body_text = get_message_body(payload)
-            email_list.append({
-                "id": msg_detail.get("id"),
-                "snippet": msg_detail.get("snippet", ""),
-                "labelIds": msg_detail.get("labelIds", []),
-                "body": body_text
-            })
-        return {"emails": email_list}
+
+        # Serve unread mail from the background prefetch when it is fresh.
+        cached_emails = get_cached_emails(query, max_results)
+        if cached_emails is not None:
+            return {"emails": cached_emails}
+
+        return {"emails": fetch_emails(query, max_results)}
     except HttpError as error:
         print(f"An error occurred: {error}")
         return {"error": str(error)}
+
+@tool
+def search_emails(query: str, max_results: int = 10) -> dict:
+    """
+    Searches synced emails with a local full-text index (subjects, senders and bodies), ranked by relevance.
+    Much faster than check_emails for finding a specific email by topic (e.g. "daycare invoice").
+
+    Args:
+        query (str): Free-text search words (not Gmail search syntax).
+        max_results (int): Maximum number of results.
+
+    Returns:
+        dict: Ranked results with id, score, from, subject and snippet. The ids can be passed to label_email.
+    """
+    index = get_mail_index()
+    # The index is synced in the background, search it as it stands.
+    response = {"results": index.search(query, max_results)}
+    if not index.last_sync:
+        response["note"] = "The mail index is still syncing, results may be incomplete. check_emails searches Gmail directly."
+    return response
+
 @tool
 def label_email(message_id: str, label: str) -> dict:
     """
@@ -182,10 +269,11 @@ def label_email(message_id: str, label: str) -> dict:
         if not label_id:
             return {"error": f"Label '{label}' not found in EMAIL_LABELS."}
         
-        creds = load_auth_client()
-        service = build("gmail", "v1", credentials=creds)
+        service = build_service("gmail", "v1")
         body = {"addLabelIds": [label_id]}
-        modified_message = service.users().messages().modify(userId="me", id=message_id, body=body).execute()
+        request = service.users().messages().modify(userId="me", id=message_id, body=body)
+        modified_message = execute_with_backoff(request, "gmail", "messages.modify")
+        invalidate_prefetch("unread")
         print(f"Label '{label}' (ID: {label_id}) added to message '{message_id}'.")
         return modified_message
     except HttpError as error:
@@ -195,7 +283,7 @@ def label_email(message_id: str, label: str) -> dict:
 @tool
 def create_draft(to_email: str, subject: str, body: str) -> dict:
     """
-    Creates and stores a draft email in Gmail.
+    Creates and stores a draft email in Gmail. The draft is queued in the outbox and created in the background.
 
     Args:
         to_email (str): Recipient email address.
@@ -203,18 +291,31 @@ def create_draft(to_email: str, subject: str, body: str) -> dict:
         body (str): Body text of the email.
 
     Returns:
-        dict: The created draft's details or error information.
+        dict: A tracking_id and status (use get_outbox_status to follow delivery), or error information.
+            When an identical message was queued recently, deduplicated is True and a note says so.
     """
     try:
-        creds = load_auth_client()
-        service = build("gmail", "v1", credentials=creds)
-        sender = "me"
-        message = create_message(sender, to_email, subject, body)
-        
-        # Create a draft from the message and store it in drafts
-        draft = service.users().drafts().create(userId="me", body={"message": message}).execute()
+        if OUTBOX_ENABLED:
+            return enqueue_email("draft", to_email, subject, body)
+        draft = deliver_email("draft", to_email, subject, body)
         print("Draft created successfully with id:", draft.get("id"))
         return draft
     except HttpError as error:
         print(f"An error occurred: {error}")
-        return {"error": str(error)}
\ No newline at end of file
+        return {"error": str(error)}
+
+@tool
+def get_outbox_status(tracking_id: str = "") -> dict:
+    """
+    Reports the delivery status of emails and drafts queued by send_email and create_draft.
+
+    Args:
+        tracking_id (str): The tracking_id returned by send_email or create_draft. If empty, the most recent messages are returned.
+
+    Returns:
+        dict: Messages with tracking_id, kind, to_email, subject, status (queued, sending, sent or failed), attempts and error.
+    """
+    messages = get_outbox().status(tracking_id or None, household_id=get_household_id())
+    if tracking_id and not messages:
+        return {"error": f"No outbox message with tracking_id '{tracking_id}'."}
+    return {"messages": messages}
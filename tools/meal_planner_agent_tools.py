@@ -1,40 +1,287 @@
 import os
+import re
 import json
-from googleapiclient.discovery import build
+from collections import Counter
+from datetime import date, timedelta
 from dotenv import load_dotenv
 from langchain_core.tools import tool
-from utils.google_auth import load_auth_client
+from utils.google_service import build_service
+from utils.rate_limiter import execute_with_backoff
 from langgraph.types import interrupt
 
 load_dotenv()
 
-@tool
-def get_recipes():
+RECIPES_GOOGLE_SHEET = os.getenv("RECIPES_GOOGLE_SHEET")
+
+# Ingredients that make a meal count as meat or fish for the plan_meals constraints.
+MEAT_KEYWORDS = {"chicken", "beef", "pork", "lamb", "bacon", "ham", "sausage", "turkey", "chorizo", "meatball", "mince"}
+FISH_KEYWORDS = {"fish", "salmon", "cod", "tuna", "shrimp", "prawn", "anchovy", "mackerel", "herring", "trout", "haddock", "pollock"}
+# Excluding one of these words excludes every meal with an ingredient of the category, e.g.
+# "fish" also excludes salmon. Other exclusions match ingredients literally.
+EXCLUDE_CATEGORIES = {"fish": FISH_KEYWORDS, "seafood": FISH_KEYWORDS, "meat": MEAT_KEYWORDS}
+
+# Plural forms the suffix rules in normalize_ingredient get wrong.
+IRREGULAR_PLURALS = {"leaves": "leaf", "loaves": "loaf", "chives": "chives", "asparagus": "asparagus",
+                     "couscous": "couscous", "hummus": "hummus", "molasses": "molasses",
+                     "quiches": "quiche", "brioches": "brioche", "ganaches": "ganache"}
+
+_QUANTITY_RE = re.compile(
+    r"^\s*[\d.,/½¼¾]+\s*(g|kg|ml|cl|dl|l|tsp|tbsp|msk|tsk|krm|st|pcs|cups?|cans?|cloves?)?\b\s*", re.IGNORECASE
+)
+
+
+def fetch_recipes() -> list:
     """
-    Fetches recipes from Google Sheets using user OAuth (NOT a service account).
+    Read the raw rows of the recipes_db sheet: a header row, then [name, ingredients] rows.
     """
-    # 1) Check if we already have a valid token stored in token.json
-    # Use from_authorized_user_info() because combined_info is a dictionary.
-    creds = load_auth_client()
-
-    # 4) Build the Sheets API client with our valid creds
-    service = build("sheets", "v4", credentials=creds)
+    # 1) Build the Sheets API client (credentials of the current household, see utils/credential_store.py)
+    service = build_service("sheets", "v4")
     sheet = service.spreadsheets()
 
-    # 5) Read data from the sheet
+    # 2) Read data from the sheet
     #    "RECIPES_GOOGLE_SHEET" is your sheet ID from .env
     READ_RANGE = "recipes_db!A1:B30"
 
-    result = sheet.values().get(
+    request = sheet.values().get(
         spreadsheetId=RECIPES_GOOGLE_SHEET,
         range=READ_RANGE
-    ).execute()
-    
-    rows = result.get("values", [])
+    )
+    result = execute_with_backoff(request, "sheets", "values.get")
+    return result.get("values", [])
+
+@tool
+def get_recipes():
+    """
+    Fetches recipes from Google Sheets using user OAuth (NOT a service account).
+    """
+    rows = fetch_recipes()
     print(rows)
 
     return {"data": rows}
 
+def _singular(word: str) -> str:
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "shes", "ches", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+def normalize_ingredient(ingredient: str) -> str:
+    """
+    Normalize an ingredient for the shopping list: lowercase, no quantity, singular last word.
+    E.g. "2 Carrots" -> "carrot", "canned tomatoes" -> "canned tomato".
+    """
+    text = _QUANTITY_RE.sub("", ingredient.strip().lower())
+    words = text.split()
+    if not words:
+        return ""
+    words[-1] = _singular(words[-1])
+    return " ".join(words)
+
+def parse_recipes(rows: list) -> list:
+    """
+    Turn recipes_db rows into [{"name", "ingredients": [normalized...]}], skipping the header,
+    empty rows and duplicate names.
+    """
+    recipes, seen = [], set()
+    for row in rows:
+        if not row or not row[0].strip():
+            continue
+        name = row[0].strip()
+        if name.lower() == "name" or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        ingredients = []
+        for ingredient in (row[1] if len(row) > 1 else "").split(","):
+            normalized = normalize_ingredient(ingredient)
+            if normalized and normalized not in ingredients:
+                ingredients.append(normalized)
+        recipes.append({"name": name, "ingredients": ingredients})
+    return recipes
+
+def _has_keyword(ingredients: list, keywords: set) -> bool:
+    return any(_singular(word) in keywords for ingredient in ingredients for word in ingredient.split())
+
+def _has_words(ingredient: str, words: tuple) -> bool:
+    """Whether the singularized words of the ingredient contain `words` in a row."""
+    ingredient_words = [_singular(word) for word in ingredient.split()]
+    return any(tuple(ingredient_words[i:i + len(words)]) == words for i in range(len(ingredient_words) - len(words) + 1))
+
+def solve_meal_plan(recipes: list, start: date, days: int, no_repeat_days: int = 7, exclude: list = None,
+                    required: list = None, max_meat_per_week: int = 2, fish_on_sundays: bool = True) -> dict:
+    """
+    Deterministically assign one dinner per day from the recipe catalog.
+
+    Each day takes the allowed recipe that, in order: is a required recipe not planned yet,
+    shares the most ingredients with the meals already planned, is the most "central" in the
+    catalog (shares ingredients with many recipes), adds the fewest new ingredients, and comes
+    first alphabetically. Allowed means not excluded, not served within no_repeat_days, within
+    the weekly meat limit, and a fish dish on Sundays when fish_on_sundays is set. Constraints
+    that cannot be met are relaxed (Sunday fish first, then the meat limit, then repeats) and
+    reported in "warnings".
+
+    Args:
+        recipes (list): As returned by parse_recipes.
+        start (date): The first day of the plan.
+        days (int): The number of dinners to plan.
+        no_repeat_days (int): A recipe is not repeated within this many days.
+        exclude (list): Recipe names, ingredients or EXCLUDE_CATEGORIES to leave out (case-insensitive).
+        required (list): Recipe names that must appear in the plan.
+        max_meat_per_week (int): Maximum meat dinners per calendar week.
+        fish_on_sundays (bool): Serve a fish dish on Sundays.
+
+    Returns:
+        dict: plan, shopping_list, warnings.
+    """
+    warnings = []
+    excluded = {normalize_ingredient(item) for item in exclude or []} | {item.strip().lower() for item in exclude or []}
+    excluded_keywords = set().union(*(EXCLUDE_CATEGORIES.get(item, set()) for item in excluded))
+    excluded_words = {tuple(_singular(word) for word in item.split()) for item in excluded if item}
+
+    def is_excluded(recipe):
+        # Excluding "tomatoes" also excludes "canned tomatoes", and "beef" excludes "beef mince".
+        return recipe["name"].lower() in excluded or _has_keyword(recipe["ingredients"], excluded_keywords) or any(
+            _has_words(ingredient, words) for ingredient in recipe["ingredients"] for words in excluded_words
+        )
+
+    catalog = [recipe for recipe in recipes if not is_excluded(recipe)]
+    by_name = {recipe["name"].lower(): recipe for recipe in catalog}
+    pending_required = []
+    for name in required or []:
+        recipe = by_name.get(name.strip().lower())
+        if recipe is None:
+            warnings.append(f"Required recipe '{name}' is not in the catalog or is excluded.")
+        elif recipe["name"] not in pending_required:
+            pending_required.append(recipe["name"])
+    if not catalog:
+        return {"plan": [], "shopping_list": [], "warnings": warnings + ["No recipes left after the exclusions."]}
+
+    document_frequency = Counter(ingredient for recipe in catalog for ingredient in recipe["ingredients"])
+    centrality = {
+        recipe["name"]: sum(document_frequency[ingredient] - 1 for ingredient in recipe["ingredients"])
+        for recipe in catalog
+    }
+    is_meat = {recipe["name"]: _has_keyword(recipe["ingredients"], MEAT_KEYWORDS) for recipe in catalog}
+    is_fish = {recipe["name"]: _has_keyword(recipe["ingredients"], FISH_KEYWORDS) for recipe in catalog}
+
+    plan, last_served, meat_per_week = [], {}, Counter()
+    shopping = Counter()
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        week = day.isocalendar()[:2]
+
+        def allowed(recipe, check_repeat=True, check_meat=True, check_fish=True):
+            name = recipe["name"]
+            if check_repeat and name in last_served and offset - last_served[name] < no_repeat_days:
+                return False
+            if check_meat and is_meat[name] and meat_per_week[week] >= max_meat_per_week:
+                return False
+            if check_fish and fish_on_sundays and day.weekday() == 6 and not is_fish[name]:
+                return False
+            return True
+
+        # Relax the Sunday fish rule first, then the meat limit, then the repeat window.
+        relaxations = [
+            {},
+            {"check_fish": False},
+            {"check_fish": False, "check_meat": False},
+            {"check_fish": False, "check_meat": False, "check_repeat": False},
+        ]
+        for checks in relaxations:
+            candidates = [recipe for recipe in catalog if allowed(recipe, **checks)]
+            if candidates:
+                break
+        repeating = checks.get("check_repeat") is False
+
+        def score(recipe):
+            ingredients = recipe["ingredients"]
+            overlap = sum(1 for ingredient in ingredients if ingredient in shopping)
+            return (
+                # When meals must repeat, repeat the one served longest ago.
+                last_served.get(recipe["name"], -days) if repeating else 0,
+                -(recipe["name"] in pending_required),
+                -overlap,
+                -centrality[recipe["name"]],
+                len(ingredients) - overlap,
+                recipe["name"].lower(),
+            )
+
+        recipe = min(candidates, key=score)
+        name = recipe["name"]
+        # Report the constraints the chosen meal actually breaks.
+        reasons = {
+            "check_fish": "no fish dish available for Sunday",
+            "check_meat": f"more than {max_meat_per_week} meat dinners this week",
+            "check_repeat": f"a meal is repeated within {no_repeat_days} days",
+        }
+        broken = [
+            reason for check, reason in reasons.items()
+            if checks.get(check) is False and not allowed(recipe, **{other: other == check for other in reasons})
+        ]
+        if broken:
+            warnings.append(f"{day.isoformat()}: {' and '.join(broken)}.")
+        if name in pending_required:
+            pending_required.remove(name)
+        last_served[name] = offset
+        if is_meat[name]:
+            meat_per_week[week] += 1
+        shopping.update(recipe["ingredients"])
+        plan.append({
+            "date": day.isoformat(),
+            "weekday": day.strftime("%A"),
+            "meal": name,
+            "ingredients": recipe["ingredients"],
+        })
+
+    for name in pending_required:
+        warnings.append(f"Required recipe '{name}' did not fit in the plan.")
+
+    shopping_list = [
+        {"ingredient": ingredient, "meals": count}
+        for ingredient, count in sorted(shopping.items())
+    ]
+    return {"plan": plan, "shopping_list": shopping_list, "warnings": warnings}
+
+@tool
+def plan_meals(start_date: str, days: int = 7, no_repeat_days: int = 7, exclude: list[str] = None,
+               required: list[str] = None, max_meat_per_week: int = 2, fish_on_sundays: bool = True) -> dict:
+    """
+    Builds a dinner meal plan from the recipes database in one call, with a consolidated shopping list.
+    Meals are chosen to share as many ingredients as possible, so the shopping list stays short.
+
+    Args:
+        start_date (str): The first day of the plan, in the format YYYY-MM-DD.
+        days (int): The number of dinners to plan (e.g. 14 for a 2-week plan).
+        no_repeat_days (int): A meal is not repeated within this many days.
+        exclude (list[str]): Meal names, ingredients or the categories "fish", "seafood" and "meat" to leave out
+            (e.g. ["Beef tacos", "mushrooms", "fish"]).
+        required (list[str]): Meal names that must appear in the plan (e.g. ["Puttanesca", "Fish Tacos"]).
+        max_meat_per_week (int): Maximum number of meat dinners per week.
+        fish_on_sundays (bool): Whether Sunday dinners should be fish dishes.
+
+    Returns:
+        dict: "plan" (date, weekday, meal, ingredients per day), "shopping_list" (deduplicated ingredients
+        with the number of meals using them) and "warnings" for constraints that could not be met.
+    """
+    try:
+        start = date.fromisoformat(start_date.strip()[:10])
+    except ValueError:
+        return {"error": f"Invalid start_date '{start_date}', expected YYYY-MM-DD."}
+    if days < 1:
+        return {"error": "days must be at least 1."}
+
+    recipes = parse_recipes(fetch_recipes())
+    return solve_meal_plan(
+        recipes, start, days, no_repeat_days=no_repeat_days, exclude=exclude, required=required,
+        max_meat_per_week=max_meat_per_week, fish_on_sundays=fish_on_sundays,
+    )
+
 @tool
 def human_feedback(query: str) -> str:
     """Request assistance from a human."""
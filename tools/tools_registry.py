@@ -1,18 +1,33 @@
-from tools.meal_planner_agent_tools import get_recipes, human_feedback
-from tools.calendar_agent_tools import get_current_date_and_time, get_calendar_events, add_calendar_event
+from tools.meal_planner_agent_tools import get_recipes, plan_meals, human_feedback
+from tools.calendar_agent_tools import get_current_date_and_time, get_calendar_events, add_calendar_event, find_free_slots
 from tools.contact_agent_tools import get_contacts, get_single_contact
-from tools.email_agent_tools import send_email, check_emails, label_email, create_draft
+from tools.email_agent_tools import send_email, check_emails, search_emails, label_email, create_draft, get_outbox_status
+from utils.tracing import traced_tool
+from utils.singleflight import READ_TOOLS, coalesced_tool
 
 TOOLS_REGISTRY = {
   "get_recipes" : get_recipes,
+  "plan_meals" : plan_meals,
   "get_current_date_and_time" : get_current_date_and_time,
   "get_calendar_events" : get_calendar_events,
   "add_calendar_event" : add_calendar_event,
+  "find_free_slots" : find_free_slots,
   "human_feedback": human_feedback,
   "get_contacts": get_contacts,
   "get_single_contact" : get_single_contact,
   "send_email": send_email,
   "check_emails": check_emails,
+  "search_emails": search_emails,
   "label_email": label_email,
-  "create_draft": create_draft
-}
\ No newline at end of file
+  "create_draft": create_draft,
+  "get_outbox_status": get_outbox_status
+}
+
+# Share in-flight calls of read tools with identical arguments (see utils/singleflight.py).
+TOOLS_REGISTRY = {
+  name: coalesced_tool(tool_fn) if name in READ_TOOLS else tool_fn
+  for name, tool_fn in TOOLS_REGISTRY.items()
+}
+
+# Record a tracing span for every tool call (see utils/tracing.py).
+TOOLS_REGISTRY = {name: traced_tool(tool_fn) for name, tool_fn in TOOLS_REGISTRY.items()}
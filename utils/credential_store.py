@@ -0,0 +1,230 @@
+import os
+import re
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from langchain_core.runnables.config import ensure_config
+from dotenv import load_dotenv
+from utils.google_auth import CREDENTIALS_PATH, TOKEN_PATH, SCOPES
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only.
+    fcntl = None
+
+load_dotenv()
+
+# Credentials of several households served by one deployment. A graph run selects its household
+# with config={"configurable": {"household_id": "..."}}; runs without one use the default
+# household, whose token is google_credentials/token.json.
+DEFAULT_HOUSEHOLD = "default"
+HOUSEHOLDS_DIR = os.path.join(os.path.dirname(TOKEN_PATH), "households")
+# Tokens are refreshed in the background when they expire within this margin.
+CREDENTIAL_REFRESH_MARGIN_S = float(os.getenv("CREDENTIAL_REFRESH_MARGIN_S", "600"))
+CREDENTIAL_REFRESH_INTERVAL_S = float(os.getenv("CREDENTIAL_REFRESH_INTERVAL_S", "60"))
+
+_HOUSEHOLD_ID_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+# Set by use_household() for work running outside a graph run, e.g. the outbox worker.
+_household_override = contextvars.ContextVar("household_override", default=None)
+
+
+def get_household_id(household_id: str = None) -> str:
+    """
+    Resolve the household whose Google account should be used.
+
+    Args:
+        household_id (str, optional): An explicit household, used as is.
+
+    Returns:
+        str: The explicit household, else the one set by use_household(), else
+        "household_id" from the graph run config, else DEFAULT_HOUSEHOLD.
+    """
+    if household_id:
+        return household_id
+    override = _household_override.get()
+    if override:
+        return override
+    configurable = ensure_config().get("configurable", {})
+    return configurable.get("household_id") or DEFAULT_HOUSEHOLD
+
+
+@contextmanager
+def use_household(household_id: str):
+    """Make the Google tools use `household_id` for the duration of the block."""
+    token = _household_override.set(household_id)
+    try:
+        yield
+    finally:
+        _household_override.reset(token)
+
+
+def token_path(household_id: str) -> str:
+    """Return the token file of a household."""
+    if household_id == DEFAULT_HOUSEHOLD:
+        return TOKEN_PATH
+    if not _HOUSEHOLD_ID_RE.match(household_id):
+        raise ValueError(f"Invalid household id '{household_id}'.")
+    return os.path.join(HOUSEHOLDS_DIR, household_id, "token.json")
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock shared with other processes using the same token file."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_atomic(path: str, data: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _expires_within(creds: Credentials, margin_s: float) -> bool:
+    if not creds.token:
+        return True
+    if creds.expiry is None:
+        return False
+    # google-auth keeps expiry as a naive UTC datetime.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds() < margin_s
+
+
+class CredentialStore:
+    """
+    In-memory cache of Google credentials per household.
+
+    Token files are read once and only written after a refresh, atomically and under a lock
+    that is shared across threads and processes, so concurrent sessions never see a partial
+    file or refresh the same token twice.
+    """
+
+    def __init__(self, refresh_margin_s: float = CREDENTIAL_REFRESH_MARGIN_S):
+        self.refresh_margin_s = refresh_margin_s
+        self.credentials = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+        self._client_info = None
+
+    def _household_lock(self, household_id: str) -> threading.Lock:
+        with self.lock:
+            return self.locks.setdefault(household_id, threading.Lock())
+
+    def _read_token(self, household_id: str) -> Credentials:
+        path = token_path(household_id)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No Google token for household '{household_id}' at {path}, "
+                f"run helper_scripts/get_token.py --household {household_id}"
+            )
+        if self._client_info is None:
+            with open(CREDENTIALS_PATH) as f:
+                self._client_info = json.load(f)['web']
+        with open(path) as f:
+            token_info = json.load(f)
+        # Merge dictionaries so that client_id and client_secret are available.
+        return Credentials.from_authorized_user_info({**self._client_info, **token_info}, SCOPES)
+
+    def _refresh(self, household_id: str, creds: Credentials) -> Credentials:
+        path = token_path(household_id)
+        with _file_lock(path):
+            # Another process may have refreshed the token while we waited for the lock.
+            on_disk = self._read_token(household_id)
+            if not _expires_within(on_disk, self.refresh_margin_s):
+                return on_disk
+            if not creds.refresh_token:
+                raise RuntimeError(
+                    f"The Google token of household '{household_id}' cannot be refreshed, "
+                    f"run helper_scripts/get_token.py --household {household_id}"
+                )
+            creds.refresh(Request())
+            _write_atomic(path, creds.to_json())
+        return creds
+
+    def get(self, household_id: str = DEFAULT_HOUSEHOLD) -> Credentials:
+        """
+        Return valid credentials for a household, loading or refreshing them if needed.
+        """
+        with self._household_lock(household_id):
+            creds = self.credentials.get(household_id)
+            if creds is None:
+                creds = self._read_token(household_id)
+            if not creds.valid:
+                creds = self._refresh(household_id, creds)
+            self.credentials[household_id] = creds
+            return creds
+
+    def refresh_expiring(self) -> list:
+        """
+        Refresh the cached credentials that expire within the refresh margin.
+
+        Returns:
+            list: The households whose tokens were refreshed.
+        """
+        with self.lock:
+            households = list(self.credentials)
+        refreshed = []
+        for household_id in households:
+            with self._household_lock(household_id):
+                creds = self.credentials[household_id]
+                if not _expires_within(creds, self.refresh_margin_s):
+                    continue
+                try:
+                    self.credentials[household_id] = self._refresh(household_id, creds)
+                    refreshed.append(household_id)
+                except Exception as error:
+                    print(f"Refreshing the Google token of household '{household_id}' failed: {error}")
+        return refreshed
+
+
+class CredentialRefresher(threading.Thread):
+    """
+    Daemon thread refreshing tokens before they expire, so tool calls do not pay for it.
+    """
+
+    def __init__(self, store: CredentialStore, interval_s: float = CREDENTIAL_REFRESH_INTERVAL_S):
+        super().__init__(name="credential-refresher", daemon=True)
+        self.store = store
+        self.interval_s = interval_s
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval_s):
+            started = time.perf_counter()
+            refreshed = self.store.refresh_expiring()
+            if refreshed:
+                print(f"Refreshed Google tokens of {refreshed} in {time.perf_counter() - started:.2f}s")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+_store = None
+_refresher = None
+_store_lock = threading.Lock()
+
+
+def get_credential_store() -> CredentialStore:
+    """Return the process-wide credential store, starting its refresher on first use."""
+    global _store, _refresher
+    with _store_lock:
+        if _store is None:
+            _store = CredentialStore()
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = CredentialRefresher(_store)
+            _refresher.start()
+        return _store
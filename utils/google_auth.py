@@ -1,8 +1,4 @@
 import os
-import json
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,38 +15,16 @@ SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
     ]
 
-def load_auth_client():
+def load_auth_client(household_id: str = None):
     """
-    Load OAuth credentials for accessing the Google Calendar API.
-    This function loads credentials from disk, refreshes them if expired,
-    or initiates a new OAuth flow if necessary.
-    """
-    # Load client info from the credentials file.
-    with open(CREDENTIALS_PATH) as f:
-        client_info = json.load(f)['web']  # Adjust the key if needed.
-
-    # Load token info.
-    with open(TOKEN_PATH) as f:
-        token_info = json.load(f)
-
-    # Merge dictionaries so that client_id and client_secret are available.
-    combined_info = {**client_info, **token_info}
+    Load OAuth credentials for accessing the Google APIs.
 
-    # Create credentials from the combined information.
-    creds = Credentials.from_authorized_user_info(combined_info, SCOPES)
+    Credentials are cached in memory per household by utils.credential_store, refreshed in the
+    background before they expire and written back to disk atomically.
 
-    # Refresh or request new credentials if necessary.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                CREDENTIALS_PATH, SCOPES
-            )
-            creds = flow.run_local_server(port=0, prompt='consent', access_type='offline')
-
-        # Save the updated credentials back to disk.
-        with open(TOKEN_PATH, "w") as token_file:
-            token_file.write(creds.to_json())
+    Args:
+        household_id (str, optional): Defaults to the "household_id" of the current graph run.
+    """
+    from utils.credential_store import get_credential_store, get_household_id
 
-    return creds
\ No newline at end of file
+    return get_credential_store().get(get_household_id(household_id))
@@ -0,0 +1,53 @@
+import os
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+from dotenv import load_dotenv
+from utils.google_auth import load_auth_client
+
+load_dotenv()
+
+# The discovery documents put part of the path in "servicePath". When the API endpoint is
+# overridden, googleapiclient uses the endpoint as the full base URL, so we add it back here.
+SERVICE_PATHS = {
+    "calendar": "calendar/v3/",
+    "gmail": "",
+    "sheets": "",
+}
+
+def get_api_base_url() -> str:
+    """
+    Return the base URL of the local Google API stand-in server, or an empty string when
+    the tools should talk to the real Google APIs.
+
+    Set GOOGLE_API_BASE_URL (e.g. "http://127.0.0.1:8765") in .env to switch the tools over
+    to helper_scripts/fake_google_server.py.
+    """
+    return os.getenv("GOOGLE_API_BASE_URL", "").strip()
+
+def build_service(api: str, version: str, household_id: str = None):
+    """
+    Build a Google API client for the tools.
+
+    Args:
+        api (str): The API name, e.g. "calendar", "gmail" or "sheets".
+        version (str): The API version, e.g. "v3".
+        household_id (str, optional): Whose Google account to use. Defaults to the
+            "household_id" of the current graph run.
+
+    Returns:
+        Resource: A googleapiclient resource for the requested API.
+    """
+    base_url = get_api_base_url()
+    if base_url:
+        # The stand-in server does not check credentials.
+        api_endpoint = base_url.rstrip("/") + "/" + SERVICE_PATHS.get(api, "")
+        return build(
+            api,
+            version,
+            credentials=AnonymousCredentials(),
+            client_options={"api_endpoint": api_endpoint},
+            cache_discovery=False,
+        )
+
+    creds = load_auth_client(household_id)
+    return build(api, version, credentials=creds)
@@ -0,0 +1,217 @@
+import os
+import time
+import itertools
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.runnables.config import ensure_config
+from dotenv import load_dotenv
+from utils.tracing import get_current_span
+
+load_dotenv()
+
+# Admission control in front of the local model: at most LLM_MAX_CONCURRENCY calls run at
+# once, the others wait in a priority queue of at most LLM_MAX_QUEUE calls.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "1"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "300"))
+# A waiting call gains one priority level per this many seconds, so long generations are
+# delayed by routing calls but never starved. 0 turns aging off.
+LLM_PRIORITY_AGING_S = float(os.getenv("LLM_PRIORITY_AGING_S", "30"))
+
+# Sessions whose last admission is remembered for fairness. The least recently served are
+# forgotten first; they had the oldest admissions anyway, so they still go before the others.
+LLM_SCHEDULER_MAX_SESSIONS = 1024
+
+# Lower runs first.
+LLM_PRIORITIES = {
+    "routing": 0,
+    "generation": 1,
+    "long_generation": 2,
+}
+
+# Priority class of each node's model. Agents not listed use "generation".
+LLM_CLASS_BY_AGENT = {
+    "supervisor": "routing",
+    "meal_planner_agent": "long_generation",
+}
+
+
+class LLMQueueFullError(RuntimeError):
+    """Raised when an LLM call is shed because the local model is overloaded."""
+
+
+class _Waiter:
+    def __init__(self, llm_class: str, session_id: str, seq: int):
+        self.llm_class = llm_class
+        self.priority = LLM_PRIORITIES[llm_class]
+        self.session_id = session_id
+        self.seq = seq
+        self.enqueued = time.monotonic()
+
+
+class LLMScheduler:
+    """
+    Bounded-concurrency scheduler for LLM calls.
+
+    Waiting calls are admitted by priority class (with aging), then by session: among equal
+    priorities the session that was served least recently goes first, so one busy session
+    cannot hold back the others. When the queue is full, new calls are rejected right away.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE,
+                 queue_timeout_s: float = LLM_QUEUE_TIMEOUT_S):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.cond = threading.Condition()
+        self.running = 0
+        self.waiters = []
+        self.last_served = OrderedDict()
+        self._ticks = itertools.count()
+        self._seq = itertools.count()
+        self.max_queue_depth = 0
+        self.metrics = defaultdict(Counter)
+
+    def _next_waiter(self) -> _Waiter:
+        now = time.monotonic()
+        aging_s = LLM_PRIORITY_AGING_S
+        # Aging works in whole levels, so calls of one class still tie and go by session.
+        return min(self.waiters, key=lambda w: (
+            w.priority - (int((now - w.enqueued) // aging_s) if aging_s > 0 else 0),
+            self.last_served.get(w.session_id, -1),
+            w.seq,
+        ))
+
+    def _admit(self, llm_class: str, session_id: str, waited: float) -> None:
+        self.running += 1
+        self.last_served[session_id] = next(self._ticks)
+        self.last_served.move_to_end(session_id)
+        while len(self.last_served) > LLM_SCHEDULER_MAX_SESSIONS:
+            self.last_served.popitem(last=False)
+        metrics = self.metrics[llm_class]
+        metrics["admitted"] += 1
+        metrics["wait_ms"] += int(waited * 1000)
+
+    def acquire(self, llm_class: str, session_id: str) -> float:
+        """
+        Wait for a slot.
+
+        Returns:
+            float: Seconds spent in the queue.
+
+        Raises:
+            LLMQueueFullError: When the queue is full, or the call waited longer than queue_timeout_s.
+        """
+        with self.cond:
+            if self.running < self.max_concurrency and not self.waiters:
+                self._admit(llm_class, session_id, 0.0)
+                return 0.0
+            if len(self.waiters) >= self.max_queue:
+                self.metrics[llm_class]["shed"] += 1
+                raise LLMQueueFullError(
+                    f"The local model is overloaded: {len(self.waiters)} LLM calls are already queued "
+                    f"(LLM_MAX_QUEUE={self.max_queue}). Please try again later."
+                )
+
+            waiter = _Waiter(llm_class, session_id, next(self._seq))
+            self.waiters.append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, len(self.waiters))
+            deadline = waiter.enqueued + self.queue_timeout_s
+            while True:
+                if self.running < self.max_concurrency and self._next_waiter() is waiter:
+                    self.waiters.remove(waiter)
+                    waited = time.monotonic() - waiter.enqueued
+                    self._admit(llm_class, session_id, waited)
+                    # Another slot may be free for the next waiter.
+                    self.cond.notify_all()
+                    return waited
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.waiters.remove(waiter)
+                    self.metrics[llm_class]["timeouts"] += 1
+                    self.cond.notify_all()
+                    raise LLMQueueFullError(
+                        f"The local model is overloaded: an LLM call waited {self.queue_timeout_s:.0f}s "
+                        f"in the queue (LLM_QUEUE_TIMEOUT_S). Please try again later."
+                    )
+                # Wake up regularly, aging can change which waiter goes next.
+                self.cond.wait(min(remaining, LLM_PRIORITY_AGING_S) if LLM_PRIORITY_AGING_S > 0 else remaining)
+
+    def release(self) -> None:
+        with self.cond:
+            self.running -= 1
+            self.cond.notify_all()
+
+    def get_metrics(self) -> dict:
+        with self.cond:
+            return {
+                "running": self.running,
+                "queue_depth": len(self.waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "queue_depth_by_class": dict(Counter(w.llm_class for w in self.waiters)),
+                "by_class": {llm_class: dict(counter) for llm_class, counter in self.metrics.items()},
+            }
+
+
+LLM_SCHEDULER = LLMScheduler()
+
+
+class AdmissionCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler that holds a scheduler slot for the duration of each chat model call.
+
+    Runs inline and raises, so a shed call fails with LLMQueueFullError before reaching Ollama.
+    """
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, llm_class: str, scheduler: LLMScheduler = None):
+        if llm_class not in LLM_PRIORITIES:
+            raise ValueError(f"Unknown LLM class '{llm_class}', expected one of {list(LLM_PRIORITIES)}.")
+        self.llm_class = llm_class
+        self.scheduler = scheduler or LLM_SCHEDULER
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        session_id = (metadata or {}).get("thread_id") or ensure_config().get("configurable", {}).get("thread_id")
+        waited = self.scheduler.acquire(self.llm_class, session_id or "default")
+        with self._lock:
+            self._held.add(run_id)
+        current_span = get_current_span()
+        if current_span is not None:
+            current_span.set("llm_queue_ms", current_span.attributes.get("llm_queue_ms", 0) + round(waited * 1000, 3))
+
+    def _release(self, run_id) -> None:
+        with self._lock:
+            if run_id not in self._held:
+                return
+            self._held.discard(run_id)
+        self.scheduler.release()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._release(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._release(run_id)
+
+
+def schedule_llm(llm, agent_name: str):
+    """
+    Route every call of a chat model through the shared LLM scheduler, with the priority class
+    of `agent_name` (see LLM_CLASS_BY_AGENT). No-op for non-LangChain models.
+    """
+    if isinstance(llm, BaseLanguageModel) and not isinstance(llm.callbacks, BaseCallbackManager):
+        callbacks = list(llm.callbacks or [])
+        if not any(isinstance(callback, AdmissionCallbackHandler) for callback in callbacks):
+            llm_class = LLM_CLASS_BY_AGENT.get(agent_name, "generation")
+            llm.callbacks = callbacks + [AdmissionCallbackHandler(llm_class)]
+    return llm
+
+
+def get_llm_scheduler_metrics() -> dict:
+    """Return running calls, queue depth and per-class admitted/shed/timeout counts and wait time."""
+    return LLM_SCHEDULER.get_metrics()
@@ -0,0 +1,345 @@
+import os
+import re
+import json
+import math
+import time
+import threading
+from collections import Counter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Local BM25 index over synced mail, used by the search_emails tool.
+MAIL_INDEX_PATH = os.getenv("MAIL_INDEX_PATH", os.path.join("mail_index", "index.jsonl"))
+MAIL_INDEX_QUERY = os.getenv("MAIL_INDEX_QUERY", "newer_than:365d")
+MAIL_INDEX_MAX_MESSAGES = int(os.getenv("MAIL_INDEX_MAX_MESSAGES", "2000"))
+# Start syncing the default household's index when the assistant starts; otherwise the sync
+# starts on the first search_emails call.
+MAIL_INDEX_ENABLED = os.getenv("MAIL_INDEX_ENABLED", "false").strip().lower() == "true"
+# A background thread syncs the index this often; 0 turns background syncing off.
+MAIL_INDEX_SYNC_INTERVAL_S = float(os.getenv("MAIL_INDEX_SYNC_INTERVAL_S", "300"))
+# Newly fetched emails are appended to the index file in batches of this size, so an
+# interrupted sync keeps its progress.
+MAIL_INDEX_SAVE_EVERY = int(os.getenv("MAIL_INDEX_SAVE_EVERY", "50"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Matches in the subject and sender count more than matches in the body.
+FIELD_WEIGHTS = {"subject": 3, "from": 2, "body": 1}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "will", "with", "about",
+    "email", "mail", "me", "my", "our", "your", "you",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens without stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class MailIndex:
+    """
+    Inverted index over email subjects, senders and cleaned bodies, ranked with BM25.
+
+    Postings map term -> {message_id: weighted term frequency}. The index file is an
+    append-only JSON lines log of added and removed messages, so a sync only writes its
+    changes; the log is compacted once it is mostly superseded records.
+    """
+
+    def __init__(self, path: str = MAIL_INDEX_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        self.sync_lock = threading.Lock()
+        self.postings = {}
+        self.docs = {}
+        self.total_length = 0
+        # Epoch seconds of the last completed sync in this process, 0.0 before the first one.
+        self.last_sync = 0.0
+        self.pending = []
+        self.log_records = 0
+        self.load()
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        unreadable = False
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # E.g. the last line of a log written when the process died.
+                    unreadable = True
+                    continue
+                if not isinstance(record, dict) or "id" not in record:
+                    unreadable = True
+                    continue
+                self._apply(record)
+                self.log_records += 1
+        if unreadable:
+            self.compact()
+
+    def _apply(self, record: dict) -> None:
+        message_id = record["id"]
+        with self.lock:
+            if record.get("removed"):
+                doc = self.docs.pop(message_id, None)
+                if doc is None:
+                    return
+                self.total_length -= doc["length"]
+                for term in doc["terms"]:
+                    postings = self.postings[term]
+                    del postings[message_id]
+                    if not postings:
+                        del self.postings[term]
+                return
+            if message_id in self.docs:
+                return
+            terms = record["terms"]
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, {})[message_id] = frequency
+            length = sum(terms.values())
+            self.docs[message_id] = {
+                "from": record["from"],
+                "subject": record["subject"],
+                "snippet": record["snippet"],
+                "length": length,
+                "terms": list(terms),
+            }
+            self.total_length += length
+
+    def save(self) -> None:
+        """Append the changes made since the last save to the index file."""
+        with self.lock:
+            records, self.pending = self.pending, []
+        if not self.path or not records:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        self.log_records += len(records)
+        if self.log_records > 2 * len(self) + 100:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the index file with one record per indexed message."""
+        if not self.path:
+            return
+        with self.lock:
+            records = [
+                {
+                    "id": message_id,
+                    "from": doc["from"],
+                    "subject": doc["subject"],
+                    "snippet": doc["snippet"],
+                    "terms": {term: self.postings[term][message_id] for term in doc["terms"]},
+                }
+                for message_id, doc in self.docs.items()
+            ]
+            self.pending = []
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        os.replace(tmp_path, self.path)
+        self.log_records = len(records)
+
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self.docs
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, email: dict) -> None:
+        """
+        Index one email as returned by tools.email_agent_tools.fetch_email.
+        """
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(email.get(field) or ""):
+                terms[token] += weight
+        record = {
+            "id": email["id"],
+            "from": email.get("from", ""),
+            "subject": email.get("subject", ""),
+            "snippet": email.get("snippet", ""),
+            "terms": dict(terms),
+        }
+        with self.lock:
+            if record["id"] in self.docs:
+                return
+            self._apply(record)
+            self.pending.append(record)
+
+    def remove(self, message_id: str) -> None:
+        """Drop an email from the index, e.g. after it was deleted in Gmail."""
+        record = {"id": message_id, "removed": True}
+        with self.lock:
+            if message_id not in self.docs:
+                return
+            self._apply(record)
+            self.pending.append(record)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Rank indexed emails against a free-text query with BM25.
+
+        Returns:
+            list: Up to `limit` dicts with id, score, from, subject and snippet, best first.
+        """
+        terms = set(tokenize(query))
+        with self.lock:
+            n_docs = len(self.docs)
+            if not n_docs or not terms:
+                return []
+            avg_length = self.total_length / n_docs
+            scores = Counter()
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for message_id, frequency in postings.items():
+                    length = self.docs[message_id]["length"]
+                    norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[message_id] += idf * frequency * (BM25_K1 + 1) / norm
+
+            return [
+                {
+                    "id": message_id,
+                    "score": round(score, 4),
+                    "from": self.docs[message_id]["from"],
+                    "subject": self.docs[message_id]["subject"],
+                    "snippet": self.docs[message_id]["snippet"],
+                }
+                for message_id, score in scores.most_common(limit)
+            ]
+
+    def sync(self, query: str = MAIL_INDEX_QUERY, max_messages: int = MAIL_INDEX_MAX_MESSAGES) -> dict:
+        """
+        Bring the index in line with the newest `max_messages` emails matching `query`: emails
+        that are not indexed yet are downloaded and added, indexed emails that are no longer
+        listed (deleted, trashed or out of the query window) are removed. Listing ids is cheap,
+        only new emails are downloaded, and progress is saved every MAIL_INDEX_SAVE_EVERY emails.
+
+        Returns:
+            dict: {"added": number of emails added, "removed": number of emails removed}.
+        """
+        from googleapiclient.errors import HttpError
+        from tools.email_agent_tools import fetch_email
+        from utils.google_service import build_service
+        from utils.rate_limiter import execute_with_backoff
+
+        with self.sync_lock:
+            service = build_service("gmail", "v1")
+            listed = []
+            page_token = None
+            while len(listed) < max_messages:
+                request = service.users().messages().list(
+                    userId="me", q=query, maxResults=min(500, max_messages - len(listed)), pageToken=page_token
+                )
+                response = execute_with_backoff(request, "gmail", "messages.list")
+                listed.extend(m["id"] for m in response.get("messages", []))
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    break
+
+            listed_ids = set(listed)
+            with self.lock:
+                removed_ids = [message_id for message_id in self.docs if message_id not in listed_ids]
+            for message_id in removed_ids:
+                self.remove(message_id)
+            self.save()
+
+            added = 0
+            for message_id in listed:
+                if message_id in self:
+                    continue
+                try:
+                    self.add(fetch_email(service, message_id))
+                except HttpError as error:
+                    # Deleted between listing and fetching.
+                    if error.resp.status != 404:
+                        raise
+                    continue
+                added += 1
+                if added % MAIL_INDEX_SAVE_EVERY == 0:
+                    self.save()
+            self.save()
+            with self.lock:
+                self.last_sync = time.time()
+            return {"added": added, "removed": len(removed_ids)}
+
+
+class MailIndexSyncer(threading.Thread):
+    """
+    Daemon thread syncing a household's mail index right away and then every interval_s
+    seconds, so search_emails never waits for Gmail.
+    """
+
+    def __init__(self, index: MailIndex, household_id: str, interval_s: float = MAIL_INDEX_SYNC_INTERVAL_S):
+        super().__init__(name=f"mail-index-sync-{household_id}", daemon=True)
+        self.index = index
+        self.household_id = household_id
+        self.interval_s = interval_s
+        self.stop_event = threading.Event()
+
+    def run(self):
+        from utils.credential_store import use_household
+
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                with use_household(self.household_id):
+                    changes = self.index.sync()
+                if changes["added"] or changes["removed"]:
+                    print(f"Mail index of household '{self.household_id}' synced in "
+                          f"{time.perf_counter() - started:.2f}s: {changes['added']} added, "
+                          f"{changes['removed']} removed")
+            except Exception as error:
+                print(f"Mail index sync of household '{self.household_id}' failed: {error}")
+            self.stop_event.wait(self.interval_s)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+_mail_indexes = {}
+_mail_index_syncers = {}
+_mail_index_lock = threading.Lock()
+
+
+def mail_index_path(household_id: str) -> str:
+    """The default household uses MAIL_INDEX_PATH, others a subdirectory next to it."""
+    from utils.credential_store import DEFAULT_HOUSEHOLD, token_path
+    if household_id == DEFAULT_HOUSEHOLD or not MAIL_INDEX_PATH:
+        return MAIL_INDEX_PATH
+    token_path(household_id)  # validates the household id
+    directory, filename = os.path.split(MAIL_INDEX_PATH)
+    return os.path.join(directory, household_id, filename)
+
+
+def get_mail_index(household_id: str = None) -> MailIndex:
+    """
+    Return the mail index of a household (default: the one of the current graph run),
+    loading it from disk and starting its background sync on first use.
+    """
+    from utils.credential_store import get_household_id
+    household_id = get_household_id(household_id)
+    with _mail_index_lock:
+        if household_id not in _mail_indexes:
+            _mail_indexes[household_id] = MailIndex(mail_index_path(household_id))
+        index = _mail_indexes[household_id]
+        syncer = _mail_index_syncers.get(household_id)
+        if MAIL_INDEX_SYNC_INTERVAL_S > 0 and (syncer is None or not syncer.is_alive()):
+            _mail_index_syncers[household_id] = MailIndexSyncer(index, household_id)
+            _mail_index_syncers[household_id].start()
+        return index
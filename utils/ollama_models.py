@@ -0,0 +1,52 @@
+import os
+from langchain_ollama import ChatOllama
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Ollama reuses the KV cache of a prompt prefix it has just evaluated. The prompts keep their
+# static system text first and append anything volatile (history, digest) at the end, so the
+# settings below are about keeping each agent's prefix loaded:
+#  - every model is created with the same context size, a different num_ctx reloads the model
+#    and a context that is too small shifts the prefix out of the window;
+#  - keep_alive keeps the model, and its cache, loaded between requests;
+#  - OLLAMA_AGENT_BASE_URLS pins agents to their own Ollama instance, e.g.
+#    "supervisor=http://127.0.0.1:11434,email_agent=http://127.0.0.1:11435". With a single
+#    instance, set OLLAMA_NUM_PARALLEL on the server to at least the number of agents so each
+#    agent's prefix keeps a slot.
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "").strip()
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m").strip()
+
+
+def parse_agent_base_urls(value: str) -> dict:
+    """Parse "agent=url,agent=url" into {agent: url}."""
+    base_urls = {}
+    for item in value.split(","):
+        if "=" in item:
+            agent_name, url = item.split("=", 1)
+            base_urls[agent_name.strip()] = url.strip()
+    return base_urls
+
+
+OLLAMA_AGENT_BASE_URLS = parse_agent_base_urls(os.getenv("OLLAMA_AGENT_BASE_URLS", ""))
+
+
+def create_chat_model(agent_name: str, model: str, **kwargs) -> ChatOllama:
+    """
+    Create the Ollama chat model of an agent with the shared cache-friendly settings.
+
+    Args:
+        agent_name (str): "supervisor" or a sub-agent name, selects the Ollama instance.
+        model (str): The Ollama model, e.g. "deepseek-r1:7b".
+        **kwargs: Extra ChatOllama arguments, e.g. format or num_predict.
+
+    Returns:
+        ChatOllama: The chat model.
+    """
+    base_url = OLLAMA_AGENT_BASE_URLS.get(agent_name) or OLLAMA_BASE_URL
+    if base_url:
+        kwargs.setdefault("base_url", base_url)
+    if OLLAMA_KEEP_ALIVE:
+        kwargs.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+    return ChatOllama(model=model, num_ctx=OLLAMA_NUM_CTX, **kwargs)
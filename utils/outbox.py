@@ -0,0 +1,273 @@
+import os
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from utils.credential_store import DEFAULT_HOUSEHOLD, get_household_id, use_household
+
+load_dotenv()
+
+# Durable local outbox for send_email and create_draft (see tools/email_agent_tools.py).
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").strip().lower() == "true"
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", os.path.join("outbox", "outbox.db"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "10"))
+OUTBOX_SEND_CONCURRENCY = int(os.getenv("OUTBOX_SEND_CONCURRENCY", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_S = float(os.getenv("OUTBOX_RETRY_BASE_S", "30"))
+# An identical message enqueued within this window is not sent again.
+OUTBOX_DEDUP_WINDOW_S = float(os.getenv("OUTBOX_DEDUP_WINDOW_S", "3600"))
+OUTBOX_POLL_INTERVAL_S = float(os.getenv("OUTBOX_POLL_INTERVAL_S", "5"))
+# A worker that claimed a message owns it for this long. Messages still "sending" after that
+# (the process died mid-delivery) are claimed again. Keep it above the worst-case delivery time,
+# or a slow send can be picked up twice.
+OUTBOX_SEND_LEASE_S = float(os.getenv("OUTBOX_SEND_LEASE_S", "600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    household_id TEXT NOT NULL DEFAULT 'default',
+    dedup_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result_id TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_dedup ON outbox (dedup_key, created_at);
+"""
+
+# Message kinds and the Gmail call that delivers them.
+KINDS = {"send": "messages.send", "draft": "drafts.create"}
+
+
+class Outbox:
+    """
+    SQLite-backed queue of outgoing emails and drafts.
+
+    Statuses: queued -> sending -> sent, or back to queued (with a delay) when rate limited,
+    and failed on other errors or once OUTBOX_MAX_ATTEMPTS is reached. A message stays "sending" for at most
+    OUTBOX_SEND_LEASE_S before another claim may take it over.
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if columns and "household_id" not in columns:
+                # Outboxes created before households were supported.
+                conn.execute("ALTER TABLE outbox ADD COLUMN household_id TEXT NOT NULL DEFAULT 'default'")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def dedup_key(kind: str, to_email: str, subject: str, body: str, household_id: str = DEFAULT_HOUSEHOLD) -> str:
+        normalized = "\x00".join([household_id, kind, to_email.strip().lower(), subject.strip(), body.strip()])
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def enqueue(self, kind: str, to_email: str, subject: str, body: str, household_id: str = DEFAULT_HOUSEHOLD) -> dict:
+        """
+        Queue a message for delivery from the Gmail account of `household_id`.
+
+        Returns:
+            dict: tracking_id, status and whether an identical recent message was reused.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown outbox message kind '{kind}'.")
+        key = self.dedup_key(kind, to_email, subject, body, household_id)
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            existing = conn.execute(
+                "SELECT id, status, created_at FROM outbox WHERE dedup_key = ? AND created_at >= ? AND status != 'failed' "
+                "ORDER BY created_at DESC LIMIT 1",
+                (key, now - OUTBOX_DEDUP_WINDOW_S),
+            ).fetchone()
+            if existing:
+                noun = "email" if kind == "send" else "draft"
+                return {
+                    "tracking_id": existing["id"],
+                    "status": existing["status"],
+                    "deduplicated": True,
+                    "note": f"An identical {noun} was already queued {int(now - existing['created_at'])}s ago "
+                            f"(tracking_id {existing['id']}, status {existing['status']}); it was not queued again.",
+                }
+
+            tracking_id = uuid.uuid4().hex[:12]
+            conn.execute(
+                "INSERT INTO outbox (id, kind, to_email, subject, body, household_id, dedup_key, status, "
+                "next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (tracking_id, kind, to_email, subject, body, household_id, key, now, now, now),
+            )
+        return {"tracking_id": tracking_id, "status": "queued", "deduplicated": False}
+
+    def claim_batch(self, limit: int = OUTBOX_BATCH_SIZE) -> list:
+        """
+        Mark up to `limit` due messages as sending and return them. The claim is a lease of
+        OUTBOX_SEND_LEASE_S: messages whose lease expired are claimed again, or failed when
+        they are out of attempts.
+        """
+        now = time.time()
+        lease_expired = now - OUTBOX_SEND_LEASE_S
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'failed', error = 'Delivery was interrupted too often.', updated_at = ? "
+                "WHERE status = 'sending' AND updated_at < ? AND attempts >= ?",
+                (now, lease_expired, OUTBOX_MAX_ATTEMPTS),
+            )
+            rows = conn.execute(
+                "SELECT * FROM outbox WHERE (status = 'queued' AND next_attempt_at <= ?) "
+                "OR (status = 'sending' AND updated_at < ?) ORDER BY created_at LIMIT ?",
+                (now, lease_expired, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET status = 'sending', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                [(now, row["id"]) for row in rows],
+            )
+        return [dict(row) for row in rows]
+
+    def mark_sent(self, tracking_id: str, result_id: str) -> None:
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'sent', result_id = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (result_id, time.time(), tracking_id),
+            )
+
+    def mark_failed(self, tracking_id: str, attempts: int, error: str) -> None:
+        """Schedule a retry with exponential backoff, or give up after OUTBOX_MAX_ATTEMPTS."""
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE outbox SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                    (error, now, tracking_id),
+                )
+            else:
+                retry_at = now + OUTBOX_RETRY_BASE_S * (2 ** (attempts - 1))
+                conn.execute(
+                    "UPDATE outbox SET status = 'queued', error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                    (error, retry_at, now, tracking_id),
+                )
+
+    def status(self, tracking_id: str = None, limit: int = 10, household_id: str = DEFAULT_HOUSEHOLD) -> list:
+        """Return the delivery status of one message, or of the most recent ones, of a household."""
+        columns = "id AS tracking_id, kind, to_email, subject, status, attempts, result_id, error, created_at, updated_at"
+        with self._connect() as conn:
+            if tracking_id:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM outbox WHERE id = ? AND household_id = ?", (tracking_id, household_id)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM outbox WHERE household_id = ? ORDER BY created_at DESC LIMIT ?",
+                    (household_id, limit),
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self) -> dict:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class OutboxWorker(threading.Thread):
+    """
+    Daemon thread delivering queued messages in batches. Messages of a batch are
+    delivered concurrently, so several emails do not wait on each other.
+    """
+
+    def __init__(self, outbox: Outbox):
+        super().__init__(name="outbox-worker", daemon=True)
+        self.outbox = outbox
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=OUTBOX_SEND_CONCURRENCY, thread_name_prefix="outbox-send")
+
+    def wake(self) -> None:
+        self.wake_event.set()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def _deliver(self, message: dict) -> None:
+        from tools.email_agent_tools import deliver_email
+        from utils.rate_limiter import is_idempotent, is_retryable
+
+        try:
+            with use_household(message["household_id"]):
+                result = deliver_email(message["kind"], message["to_email"], message["subject"], message["body"])
+            self.outbox.mark_sent(message["id"], result.get("id"))
+        except Exception as error:
+            print(f"Outbox delivery of {message['id']} failed: {error}")
+            # Sends and drafts are retried only when rate limited: after a server error or a lost
+            # connection Gmail may have delivered the message, and a retry would duplicate it.
+            # Errors like an invalid recipient will not go away by retrying either.
+            if is_retryable(error, idempotent=is_idempotent("gmail", KINDS[message["kind"]])):
+                self.outbox.mark_failed(message["id"], message["attempts"] + 1, str(error))
+            elif is_retryable(error):
+                self.outbox.mark_failed(
+                    message["id"], OUTBOX_MAX_ATTEMPTS,
+                    f"{error} (the message may have been delivered, check the Sent folder or drafts before trying again)",
+                )
+            else:
+                self.outbox.mark_failed(message["id"], OUTBOX_MAX_ATTEMPTS, str(error))
+
+    def run(self):
+        while not self.stop_event.is_set():
+            batch = self.outbox.claim_batch()
+            if batch:
+                list(self.pool.map(self._deliver, batch))
+                continue
+            self.wake_event.wait(OUTBOX_POLL_INTERVAL_S)
+            self.wake_event.clear()
+        self.pool.shutdown(wait=True)
+
+
+_outbox = None
+_worker = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """Return the process-wide outbox, starting its worker on first use."""
+    global _outbox, _worker
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = Outbox()
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker(_outbox)
+            _worker.start()
+        return _outbox
+
+
+def enqueue_email(kind: str, to_email: str, subject: str, body: str) -> dict:
+    """Queue an email ("send") or draft ("draft") for the current household and wake the worker."""
+    outbox = get_outbox()
+    result = outbox.enqueue(kind, to_email, subject, body, get_household_id())
+    _worker.wake()
+    return result
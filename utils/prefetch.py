@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Background prefetch of upcoming calendar events and unread mail, plus a compact digest.
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").strip().lower() == "true"
+PREFETCH_INTERVAL_S = float(os.getenv("PREFETCH_INTERVAL_S", "300"))
+PREFETCH_DAYS = int(os.getenv("PREFETCH_DAYS", "7"))
+PREFETCH_UNREAD_MAX = int(os.getenv("PREFETCH_UNREAD_MAX", "25"))
+# Prefetched data older than this is not served, the tools go to Google instead.
+PREFETCH_MAX_AGE_S = float(os.getenv("PREFETCH_MAX_AGE_S", "900"))
+# When set, snapshots are written to / read from this file so a sidecar process
+# (helper_scripts/prefetch_sidecar.py) can do the fetching.
+PREFETCH_SNAPSHOT_PATH = os.getenv("PREFETCH_SNAPSHOT_PATH", "").strip()
+
+UNREAD_QUERY = "is:unread"
+DIGEST_TIME_ZONE = ZoneInfo("Europe/Stockholm")
+
+
+def _serves_current_household() -> bool:
+    # The prefetch runs with the default household's credentials only.
+    from utils.credential_store import DEFAULT_HOUSEHOLD, get_household_id
+    return get_household_id() == DEFAULT_HOUSEHOLD
+
+
+class PrefetchCache:
+    """
+    Holds the latest prefetch snapshot:
+        {
+            "fetched_at": epoch seconds when the fetch started,
+            "window_start": RFC3339 string, "window_end": RFC3339 string,
+            "events": [parsed events sorted by start],
+            "unread": [emails as returned by check_emails],
+            "unread_complete": True when every unread email fits in "unread",
+            "digest": str,
+        }
+    """
+
+    def __init__(self, snapshot_path: str = PREFETCH_SNAPSHOT_PATH, max_age_s: float = PREFETCH_MAX_AGE_S):
+        self.snapshot_path = snapshot_path
+        self.max_age_s = max_age_s
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self._loaded_mtime = None
+        # Part ("events" or "unread") -> epoch seconds of the last write that made it stale.
+        self.invalidated_at = {}
+
+    def update(self, snapshot: dict) -> None:
+        with self.lock:
+            self.snapshot = snapshot
+        if self.snapshot_path:
+            # Write atomically so readers never see a partial file.
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+
+    def _reload_from_disk(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.snapshot_path)
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        with open(self.snapshot_path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        with self.lock:
+            self.snapshot = snapshot
+            self._loaded_mtime = mtime
+
+    def invalidate(self, *parts: str) -> None:
+        """
+        Stop serving parts ("events", "unread") of the current snapshot because a write made
+        them stale. Snapshots fetched after this call are served again.
+        """
+        now = time.time()
+        with self.lock:
+            for part in parts:
+                self.invalidated_at[part] = now
+
+    def get(self, *parts: str):
+        """
+        Return the latest snapshot, or None if there is none, it is too old, or one of `parts`
+        was invalidated after it was fetched.
+        """
+        if self.snapshot_path:
+            self._reload_from_disk()
+        with self.lock:
+            snapshot = self.snapshot
+            invalidated_at = max((self.invalidated_at.get(part, 0.0) for part in parts), default=0.0)
+        if snapshot is None or time.time() - snapshot["fetched_at"] > self.max_age_s:
+            return None
+        if invalidated_at >= snapshot["fetched_at"]:
+            return None
+        return snapshot
+
+
+PREFETCH_CACHE = PrefetchCache()
+
+
+def _parse_rfc3339(value: str) -> datetime:
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def get_cached_events(time_min: str, time_max: str):
+    """
+    Serve calendar events from the prefetch cache.
+
+    Args:
+        time_min (str): RFC3339 lower bound, as passed to events.list.
+        time_max (str): RFC3339 upper bound, as passed to events.list.
+
+    Returns:
+        list | None: The events overlapping the range, or None when the range is not covered
+        by a fresh snapshot.
+    """
+    if not time_max or not _serves_current_household():
+        return None
+    snapshot = PREFETCH_CACHE.get("events")
+    if snapshot is None:
+        return None
+    lower, upper = _parse_rfc3339(time_min), _parse_rfc3339(time_max)
+    if lower < _parse_rfc3339(snapshot["window_start"]) or upper > _parse_rfc3339(snapshot["window_end"]):
+        return None
+
+    from tools.calendar_agent_tools import get_event_start, get_event_end
+    return [
+        event for event in snapshot["events"]
+        if get_event_end(event) > lower and get_event_start(event) < upper
+    ]
+
+
+def get_cached_emails(query: str, max_results: int):
+    """
+    Serve an unread-mail query from the prefetch cache.
+
+    Returns:
+        list | None: Up to max_results emails, or None when the query cannot be served from cache.
+    """
+    if " ".join(query.lower().split()) != UNREAD_QUERY or not _serves_current_household():
+        return None
+    snapshot = PREFETCH_CACHE.get("unread")
+    if snapshot is None:
+        return None
+    unread = snapshot["unread"]
+    if max_results > len(unread) and not snapshot["unread_complete"]:
+        return None
+    return unread[:max_results]
+
+
+def build_digest(events: list, unread: list, generated_at: datetime) -> str:
+    """
+    Build a compact plain-text digest of the upcoming events and unread mail.
+    """
+    from tools.calendar_agent_tools import CALENDAR_IDS, get_event_start
+
+    calendar_names = {calendar_id: name for name, calendar_id in CALENDAR_IDS.items()}
+    lines = [f"Digest generated {generated_at.strftime('%Y-%m-%d %H:%M')} (Europe/Stockholm)."]
+
+    lines.append(f"Upcoming events, next {PREFETCH_DAYS} days ({len(events)}):")
+    current_day = None
+    for event in events:
+        start = get_event_start(event).astimezone(DIGEST_TIME_ZONE)
+        day = start.strftime("%A %Y-%m-%d")
+        if day != current_day:
+            lines.append(f"{day}:")
+            current_day = day
+        when = "all day" if "date" in (event.get("start") or {}) else start.strftime("%H:%M")
+        calendar = calendar_names.get(event.get("calendarId"), event.get("calendarId"))
+        lines.append(f"  - {when} {event.get('summary') or '(no title)'} [{calendar}]")
+
+    lines.append(f"Unread emails ({len(unread)}{'' if len(unread) < PREFETCH_UNREAD_MAX else '+'}):")
+    for email in unread:
+        lines.append(f"  - {email.get('from', '')}: {email.get('subject', '')} (id {email.get('id')})")
+    return "\n".join(lines)
+
+
+def refresh_prefetch(cache: PrefetchCache = None) -> dict:
+    """
+    Fetch the next PREFETCH_DAYS days of events from all CALENDAR_IDS and the unread mail,
+    build the digest and store everything in the cache.
+    """
+    import pytz
+    from tools.calendar_agent_tools import fetch_calendar_events, format_datetime
+    from tools.email_agent_tools import fetch_emails
+
+    cache = cache or PREFETCH_CACHE
+    # Taken before fetching, so writes made during the fetch still invalidate this snapshot.
+    fetched_at = time.time()
+    now = datetime.now(pytz.timezone("Europe/Stockholm"))
+    window_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    window_end = window_start + timedelta(days=PREFETCH_DAYS + 1)
+
+    # The cache claims to hold every event of the window, so fetch all pages.
+    events = fetch_calendar_events(
+        format_datetime(window_start), format_datetime(window_end), max_results=250, all_pages=True
+    )
+    unread = fetch_emails(UNREAD_QUERY, PREFETCH_UNREAD_MAX)
+
+    snapshot = {
+        "fetched_at": fetched_at,
+        "window_start": format_datetime(window_start.astimezone(timezone.utc)),
+        "window_end": format_datetime(window_end.astimezone(timezone.utc)),
+        "events": events,
+        "unread": unread,
+        "unread_complete": len(unread) < PREFETCH_UNREAD_MAX,
+        "digest": build_digest(events, unread, now),
+    }
+    cache.update(snapshot)
+    return snapshot
+
+
+def get_digest():
+    """Return the precomputed digest text, or None when no fresh snapshot is available."""
+    if not _serves_current_household():
+        return None
+    snapshot = PREFETCH_CACHE.get("events", "unread")
+    return snapshot["digest"] if snapshot else None
+
+
+def invalidate_prefetch(*parts: str) -> None:
+    """
+    Called by the write tools: stop serving the prefetched "events" or "unread" mail until the
+    next refresh, so the agent never reads back a state from before its own write.
+    """
+    if _serves_current_household():
+        PREFETCH_CACHE.invalidate(*parts)
+
+
+class PrefetchScheduler(threading.Thread):
+    """
+    Daemon thread refreshing the prefetch cache every PREFETCH_INTERVAL_S seconds.
+    """
+
+    def __init__(self, interval_s: float = PREFETCH_INTERVAL_S, cache: PrefetchCache = None):
+        super().__init__(name="prefetch-scheduler", daemon=True)
+        self.interval_s = interval_s
+        self.cache = cache or PREFETCH_CACHE
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                snapshot = refresh_prefetch(self.cache)
+                print(f"Prefetch refreshed in {time.perf_counter() - started:.2f}s: "
+                      f"{len(snapshot['events'])} events, {len(snapshot['unread'])} unread emails")
+            except Exception as error:
+                print(f"Prefetch failed: {error}")
+            self.stop_event.wait(self.interval_s)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_prefetch_scheduler(interval_s: float = PREFETCH_INTERVAL_S) -> PrefetchScheduler:
+    """Start the in-process prefetch scheduler (once per process)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = PrefetchScheduler(interval_s)
+            _scheduler.start()
+        return _scheduler
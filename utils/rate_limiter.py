@@ -0,0 +1,225 @@
+import os
+import time
+import random
+import threading
+from collections import Counter, defaultdict
+from googleapiclient.errors import HttpError
+from dotenv import load_dotenv
+from utils.tracing import get_current_span
+from utils.credential_store import get_household_id
+
+load_dotenv()
+
+# Per-user quotas, expressed as token buckets: "capacity" is the allowed burst and
+# "refill_per_s" the sustained rate, both in quota units.
+#   Gmail:    250 quota units per user per second
+#   Calendar: 600 requests per user per minute
+#   Sheets:   60 read requests per user per minute
+API_QUOTAS = {
+    "gmail": {"capacity": 250, "refill_per_s": 250},
+    "calendar": {"capacity": 20, "refill_per_s": 10},
+    "sheets": {"capacity": 60, "refill_per_s": 1},
+}
+
+# Quota units charged per method. Methods not listed cost 1 unit.
+METHOD_COSTS = {
+    "gmail": {
+        "messages.list": 5,
+        "messages.get": 5,
+        "messages.modify": 5,
+        "messages.send": 100,
+        "drafts.create": 10,
+        "labels.list": 1,
+    },
+}
+
+MAX_RETRIES = int(os.getenv("GOOGLE_MAX_RETRIES", "4"))
+BACKOFF_BASE_S = float(os.getenv("GOOGLE_BACKOFF_BASE_S", "0.5"))
+BACKOFF_MAX_S = float(os.getenv("GOOGLE_BACKOFF_MAX_S", "16"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Gmail and Calendar report rate limiting as 403 with one of these reasons.
+RETRYABLE_403_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+
+# Writes that are not safe to repeat: after a 5xx or a dropped connection the request may
+# already have been applied, and retrying would send the email or create the event twice.
+# They are only retried when rate limited, which means the request was rejected. The outbox
+# owns any further retries of sends and drafts.
+NON_IDEMPOTENT_METHODS = {
+    "gmail": {"messages.send", "drafts.create"},
+    "calendar": {"events.insert"},
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, capacity: float, refill_per_s: float):
+        self.capacity = capacity
+        self.refill_per_s = refill_per_s
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_s)
+        self.updated = now
+
+    def acquire(self, cost: float) -> float:
+        """
+        Take `cost` tokens, waiting if needed.
+
+        Returns:
+            float: Seconds spent waiting (0.0 when not throttled).
+        """
+        cost = min(cost, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                wait = (cost - self.tokens) / self.refill_per_s
+            time.sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    """
+    Shared limiter for all Google API calls made by the tools: one token bucket per API and
+    household (the quotas are per user), plus counters for throttling and retries.
+    """
+
+    def __init__(self, quotas: dict = API_QUOTAS, method_costs: dict = METHOD_COSTS):
+        self.quotas = quotas
+        self.method_costs = method_costs
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.metrics = defaultdict(Counter)
+
+    def _bucket(self, api: str, household_id: str) -> TokenBucket:
+        key = (api, household_id)
+        with self.lock:
+            if key not in self.buckets:
+                quota = self.quotas.get(api, {"capacity": 10, "refill_per_s": 10})
+                self.buckets[key] = TokenBucket(quota["capacity"], quota["refill_per_s"])
+            return self.buckets[key]
+
+    def cost(self, api: str, method: str) -> int:
+        return self.method_costs.get(api, {}).get(method, 1)
+
+    def acquire(self, api: str, method: str) -> None:
+        cost = self.cost(api, method)
+        waited = self._bucket(api, get_household_id()).acquire(cost)
+        with self.lock:
+            metrics = self.metrics[api]
+            metrics["requests"] += 1
+            metrics["quota_units"] += cost
+            if waited > 0:
+                metrics["throttled"] += 1
+                metrics["throttle_wait_ms"] += int(waited * 1000)
+
+    def record(self, api: str, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.metrics[api][key] += amount
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            return {api: dict(counter) for api, counter in self.metrics.items()}
+
+
+RATE_LIMITER = RateLimiter()
+
+
+def is_idempotent(api: str, method: str) -> bool:
+    """Return False for the writes listed in NON_IDEMPOTENT_METHODS."""
+    return method not in NON_IDEMPOTENT_METHODS.get(api, ())
+
+
+def _is_rate_limited(error: HttpError) -> bool:
+    status = error.resp.status
+    if status == 429:
+        return True
+    if status == 403:
+        reasons = {detail.get("reason") for detail in (error.error_details or []) if isinstance(detail, dict)}
+        return bool(reasons & RETRYABLE_403_REASONS)
+    return False
+
+
+def is_retryable(error: Exception, idempotent: bool = True) -> bool:
+    """
+    Return True for errors worth retrying.
+
+    Args:
+        error (Exception): The error raised by the request.
+        idempotent (bool): Whether the request is safe to repeat. Idempotent requests are retried
+            on rate limiting, 5xx and connection problems, the others on rate limiting only.
+    """
+    if isinstance(error, HttpError):
+        if _is_rate_limited(error):
+            return True
+        return idempotent and error.resp.status in RETRYABLE_STATUSES
+    return idempotent and isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _retry_after(error: Exception):
+    if isinstance(error, HttpError):
+        value = error.resp.get("retry-after")
+        if value and value.isdigit():
+            return float(value)
+    return None
+
+
+def execute_with_backoff(request, api: str, method: str, limiter: RateLimiter = None):
+    """
+    Execute a googleapiclient request through the shared rate limiter, retrying transient
+    errors with jittered exponential backoff. Methods in NON_IDEMPOTENT_METHODS are only
+    retried when rate limited.
+
+    Args:
+        request: The googleapiclient HttpRequest (e.g. service.users().messages().list(...)).
+        api (str): The API the request belongs to ("gmail", "calendar" or "sheets").
+        method (str): The method name used for quota costs, e.g. "messages.send".
+        limiter (RateLimiter, optional): Defaults to the shared RATE_LIMITER.
+
+    Returns:
+        dict: The API response.
+
+    Raises:
+        HttpError: When the error is not transient or the retries are exhausted.
+    """
+    limiter = limiter or RATE_LIMITER
+    idempotent = is_idempotent(api, method)
+    attempt = 0
+    while True:
+        limiter.acquire(api, method)
+        try:
+            return request.execute()
+        except Exception as error:
+            if not is_retryable(error, idempotent):
+                raise
+            status = error.resp.status if isinstance(error, HttpError) else type(error).__name__
+            if attempt >= MAX_RETRIES:
+                limiter.record(api, "retries_exhausted")
+                raise
+            # Full jitter: sleep a random time up to the exponential backoff ceiling.
+            delay = _retry_after(error)
+            if delay is None:
+                delay = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** attempt)))
+            limiter.record(api, "retries")
+            limiter.record(api, f"retries_{status}")
+            limiter.record(api, "backoff_ms", int(delay * 1000))
+            current_span = get_current_span()
+            if current_span is not None:
+                current_span.set("google_retries", current_span.attributes.get("google_retries", 0) + 1)
+            attempt += 1
+            time.sleep(delay)
+
+
+def get_rate_limit_metrics() -> dict:
+    """Return throttling and retry counters per API."""
+    return RATE_LIMITER.get_metrics()
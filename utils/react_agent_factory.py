@@ -2,17 +2,22 @@
 from typing import Literal
 
 from langchain_core.messages import AIMessage
-from langchain_ollama import ChatOllama
 from langgraph.types import Command
 from langgraph.graph import MessagesState
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 from utils.utils import get_agent_config
+from utils.tracing import instrument_llm, traced_node
+from utils.ollama_models import create_chat_model
+from utils.llm_scheduler import schedule_llm
 
-def create_agent_node(agent_name: str, default_goto: str = "supervisor"):
+def create_agent_node(agent_name: str, default_goto: str = "supervisor", llm_factory=None):
     """
     Creates and returns a node function for a given agent_name.
     Each returned node function can be used in the state graph.
+
+    llm_factory is an optional callable (agent_name, model_name) -> chat model, used to swap
+    the Ollama model for another chat model (e.g. the scripted models in the benchmarks).
     """
     # Load the config based on the agent name
     agent_config = get_agent_config(agent_name)
@@ -23,9 +28,14 @@ def create_agent_node(agent_name: str, default_goto: str = "supervisor"):
     memory = MemorySaver()
 
     # Create the LLM and the agent
-    agent_llm = ChatOllama(model=agent_model)
+    if llm_factory is not None:
+        agent_llm = llm_factory(agent_name, agent_model)
+    else:
+        agent_llm = create_chat_model(agent_name, agent_model)
+    # The formatted prompt is built once here, so every call starts with the same bytes and
+    # Ollama can reuse its cached prefix.
     agent = create_react_agent(
-        agent_llm,
+        instrument_llm(schedule_llm(agent_llm, agent_name)),
         tools=agent_tools,
         prompt=agent_prompt,
         checkpointer=memory
@@ -56,4 +66,4 @@ def create_agent_node(agent_name: str, default_goto: str = "supervisor"):
             goto=default_goto
         )
 
-    return node_func
\ No newline at end of file
+    return traced_node(agent_name, node_func)
\ No newline at end of file
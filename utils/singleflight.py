@@ -0,0 +1,142 @@
+import os
+import copy
+import json
+import inspect
+import functools
+import threading
+from collections import Counter, defaultdict
+from dotenv import load_dotenv
+from utils.tracing import get_current_span
+from utils.credential_store import get_household_id
+
+load_dotenv()
+
+# Concurrent calls of a read tool with the same arguments share one in-flight call.
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").strip().lower() == "true"
+
+# Only tools without side effects may be coalesced. Write tools (add_calendar_event,
+# send_email, create_draft, label_email) and human_feedback must run once per call.
+READ_TOOLS = frozenset({
+    "get_calendar_events",
+    "find_free_slots",
+    "get_recipes",
+    "plan_meals",
+    "get_contacts",
+    "get_single_contact",
+    "check_emails",
+    "search_emails",
+})
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call with the same key
+    is in flight wait for it and get its result (or exception) instead of calling again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.metrics = defaultdict(Counter)
+
+    def do(self, key: tuple, fn):
+        """
+        Returns:
+            tuple: (result, coalesced) where coalesced is True when the result came from
+            another caller's call.
+        """
+        name = key[0]
+        with self.lock:
+            self.metrics[name]["calls"] += 1
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                self.metrics[name]["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Every caller gets its own copy, results are plain dicts and lists.
+            return copy.deepcopy(call.result), True
+
+        try:
+            call.result = fn()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                self.metrics[name]["executed"] += 1
+                del self.calls[key]
+            call.done.set()
+        return call.result, False
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            return {name: dict(counter) for name, counter in self.metrics.items()}
+
+
+SINGLE_FLIGHT = SingleFlight()
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def call_key(name: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> tuple:
+    """
+    Key of a tool call: tool name, household and the arguments with defaults filled in,
+    so get_single_contact("peter") and get_single_contact(query=" peter ") coalesce.
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = json.dumps(_normalize(bound.arguments), sort_keys=True, default=str)
+    return name, get_household_id(), arguments
+
+
+def coalesced_tool(tool, single_flight: SingleFlight = None):
+    """
+    Return a copy of a LangChain read tool whose concurrent identical calls are coalesced.
+
+    Raises:
+        ValueError: When the tool is not in READ_TOOLS.
+    """
+    if tool.name not in READ_TOOLS:
+        raise ValueError(f"Tool '{tool.name}' has side effects and cannot be coalesced.")
+    single_flight = single_flight or SINGLE_FLIGHT
+    func = tool.func
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not SINGLEFLIGHT_ENABLED:
+            return func(*args, **kwargs)
+        key = call_key(tool.name, signature, args, kwargs)
+        result, coalesced = single_flight.do(key, lambda: func(*args, **kwargs))
+        current_span = get_current_span()
+        if current_span is not None:
+            current_span.set("coalesced", coalesced)
+        return result
+
+    return tool.model_copy(update={"func": wrapper})
+
+
+def get_singleflight_metrics() -> dict:
+    """Return calls, executed and coalesced counts per tool."""
+    return SINGLE_FLIGHT.get_metrics()
@@ -0,0 +1,394 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager, nullcontext
+from collections import defaultdict
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.runnables.config import ensure_config
+
+load_dotenv()
+
+# Where spans go: "jsonl" (TRACE_PATH), "otel" (the configured OpenTelemetry tracer provider) or "off".
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "off").strip().lower()
+TRACE_PATH = os.getenv("TRACE_PATH", os.path.join("traces", "spans.jsonl"))
+LANGTRACE_API_KEY = os.getenv("LANGTRACE_API_KEY")
+
+_current_trace_id = contextvars.ContextVar("trace_id", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+_write_lock = threading.Lock()
+_otel_tracer = None
+
+
+def tracing_enabled() -> bool:
+    return TRACE_EXPORTER in ("jsonl", "otel")
+
+
+def _get_otel_tracer():
+    """
+    Return an OpenTelemetry tracer, initializing Langtrace first when LANGTRACE_API_KEY is set
+    so spans are shipped to Langtrace through its tracer provider.
+    """
+    global _otel_tracer
+    if _otel_tracer is None:
+        if LANGTRACE_API_KEY:
+            from langtrace_python_sdk import langtrace
+            langtrace.init(api_key=LANGTRACE_API_KEY)
+        from opentelemetry import trace
+        _otel_tracer = trace.get_tracer("home-assistant")
+    return _otel_tracer
+
+
+class Span:
+    """
+    A timed unit of work (a graph node, a tool call or an LLM call).
+    """
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def add_tokens(self, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        self.attributes["prompt_tokens"] = self.attributes.get("prompt_tokens", 0) + (prompt_tokens or 0)
+        self.attributes["completion_tokens"] = self.attributes.get("completion_tokens", 0) + (completion_tokens or 0)
+
+    def finish(self, error: BaseException = None) -> None:
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def export_span(span: Span) -> None:
+    """Append a finished span to the JSONL trace file."""
+    if TRACE_EXPORTER != "jsonl":
+        return
+    line = json.dumps(span.to_dict(), default=str)
+    with _write_lock:
+        directory = os.path.dirname(TRACE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class GraphRunTracker(BaseCallbackHandler):
+    """
+    Callback handler mapping every LangChain run of a graph invocation to the root run, so
+    spans recorded outside start_trace() (e.g. under LangGraph Studio) still get one trace ID
+    per request.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.roots = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if not tracing_enabled():
+            return
+        with self.lock:
+            # A parent that is not tracked is the root (it started before the handler was attached).
+            self.roots[run_id] = self.roots.get(parent_run_id, parent_run_id or run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        with self.lock:
+            self.roots.pop(run_id, None)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        with self.lock:
+            self.roots.pop(run_id, None)
+
+    def root_of(self, run_id):
+        with self.lock:
+            return self.roots.get(run_id)
+
+
+GRAPH_RUN_TRACKER = GraphRunTracker()
+
+
+def traced_graph(graph):
+    """Return the compiled graph with GRAPH_RUN_TRACKER attached to every invocation."""
+    return graph.with_config(callbacks=[GRAPH_RUN_TRACKER])
+
+
+def _resolve_trace_id() -> str:
+    trace_id = _current_trace_id.get()
+    if trace_id:
+        return trace_id
+    # Outside of start_trace(), use the root run of the current graph invocation.
+    callbacks = ensure_config().get("callbacks")
+    root_run_id = GRAPH_RUN_TRACKER.root_of(getattr(callbacks, "parent_run_id", None))
+    return root_run_id.hex if root_run_id else uuid.uuid4().hex
+
+
+def get_current_span():
+    """Return the span currently being recorded, or None."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(trace_id: str = None):
+    """
+    Group all spans recorded inside the block under one trace ID (one user request).
+
+    Usage:
+        with start_trace() as trace_id:
+            graph.invoke(...)
+    """
+    trace_id = trace_id or uuid.uuid4().hex
+    token = _current_trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _current_trace_id.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: str, **attributes):
+    """
+    Record a span around a block of code. Yields the Span, or None when tracing is off.
+    """
+    if not tracing_enabled():
+        yield None
+        return
+
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else _resolve_trace_id()
+    current = Span(name, kind, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+
+    otel_cm = _get_otel_tracer().start_as_current_span(name) if TRACE_EXPORTER == "otel" else nullcontext()
+    with otel_cm as otel_span:
+        error = None
+        try:
+            yield current
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            current.finish(error)
+            _current_span.reset(token)
+            if otel_span is not None:
+                otel_span.set_attribute("kind", kind)
+                otel_span.set_attribute("trace_id", trace_id)
+                for key, value in current.attributes.items():
+                    if isinstance(value, (str, bool, int, float)):
+                        otel_span.set_attribute(key, value)
+                if error is not None:
+                    otel_span.record_exception(error)
+            export_span(current)
+
+
+def _payload_size(value) -> int:
+    """Approximate size in bytes of a tool or node payload."""
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+def traced_node(name: str, func):
+    """
+    Wrap a graph node function so each run is recorded as a "node" span.
+    """
+
+    @functools.wraps(func)
+    def wrapper(state):
+        if not tracing_enabled():
+            return func(state)
+        with span(name, "node", input_messages=len(state.get("messages", []))) as s:
+            result = func(state)
+            update = getattr(result, "update", None)
+            s.set("goto", str(getattr(result, "goto", "")))
+            s.set("output_bytes", _payload_size(update))
+            return result
+
+    return wrapper
+
+
+def traced_tool(tool):
+    """
+    Return a copy of a LangChain tool whose function records a "tool" span per call.
+    """
+    func = tool.func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not tracing_enabled():
+            return func(*args, **kwargs)
+        with span(tool.name, "tool", input_bytes=_payload_size([args, kwargs])) as s:
+            result = func(*args, **kwargs)
+            s.set("output_bytes", _payload_size(result))
+            if isinstance(result, dict) and "error" in result:
+                s.status = "error"
+                s.error = str(result["error"])
+            return result
+
+    return tool.model_copy(update={"func": wrapper})
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that records every chat model call as an "llm" span,
+    nested under the node or tool span it was made from, with token counts.
+    """
+
+    def __init__(self):
+        self._runs = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        if not tracing_enabled():
+            return
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else _resolve_trace_id()
+        prompt = sum(len(str(m.content)) for batch in messages for m in batch)
+        attributes = {"prompt_bytes": prompt}
+        if parent is not None:
+            attributes["node"] = parent.name
+        self._runs[run_id] = Span(
+            (serialized or {}).get("name") or "chat_model", "llm", trace_id,
+            parent.span_id if parent else None, attributes,
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        llm_span = self._runs.pop(run_id, None)
+        if llm_span is None:
+            return
+        prompt_tokens, completion_tokens = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+                if message is not None:
+                    metadata = message.response_metadata
+                    llm_span.set("model", metadata.get("model", llm_span.attributes.get("model")))
+                    # Ollama timings: a short prompt eval means the prompt prefix came from the KV cache.
+                    if "prompt_eval_duration" in metadata:
+                        llm_span.set("prompt_eval_ms", round(metadata["prompt_eval_duration"] / 1e6, 3))
+                        llm_span.set("prompt_eval_tokens", metadata.get("prompt_eval_count", 0))
+                    if "load_duration" in metadata:
+                        llm_span.set("load_ms", round(metadata["load_duration"] / 1e6, 3))
+        llm_span.add_tokens(prompt_tokens, completion_tokens)
+        llm_span.finish()
+        parent = _current_span.get()
+        if parent is not None:
+            parent.add_tokens(prompt_tokens, completion_tokens)
+        export_span(llm_span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        llm_span = self._runs.pop(run_id, None)
+        if llm_span is None:
+            return
+        llm_span.finish(error)
+        export_span(llm_span)
+
+
+TRACING_CALLBACK = TracingCallbackHandler()
+
+
+def instrument_llm(llm):
+    """
+    Attach the tracing callback handler to a chat model (no-op for non-LangChain models).
+    """
+    if isinstance(llm, BaseLanguageModel) and not isinstance(llm.callbacks, BaseCallbackManager):
+        callbacks = list(llm.callbacks or [])
+        if TRACING_CALLBACK not in callbacks:
+            llm.callbacks = callbacks + [TRACING_CALLBACK]
+    return llm
+
+
+def load_spans(path: str = None) -> list:
+    """Read spans back from a JSONL trace file."""
+    spans = []
+    with open(path or TRACE_PATH, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def summarize_trace(spans: list) -> dict:
+    """
+    Summarize spans per trace (request): wall time, per span name the call count,
+    total/max duration, tokens, payload sizes and errors, and per node the Ollama prompt
+    eval time of each LLM call in order, to check that prompt prefixes are reused.
+    """
+    traces = defaultdict(list)
+    for s in spans:
+        traces[s["trace_id"]].append(s)
+
+    summary = {}
+    for trace_id, trace_spans in traces.items():
+        start = min(s["start_time"] for s in trace_spans)
+        end = max(s["start_time"] + (s["duration_ms"] or 0) / 1000 for s in trace_spans)
+        by_name = {}
+        prompt_eval = {}
+        for s in sorted(trace_spans, key=lambda item: item["start_time"]):
+            key = f"{s['kind']}:{s['name']}"
+            entry = by_name.setdefault(key, {
+                "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "prompt_tokens": 0,
+                "completion_tokens": 0, "output_bytes": 0, "errors": 0,
+            })
+            attributes = s.get("attributes", {})
+            entry["calls"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + (s["duration_ms"] or 0), 3)
+            entry["max_ms"] = max(entry["max_ms"], s["duration_ms"] or 0)
+            # Node spans also carry the tokens of their LLM calls, count them once.
+            if s["kind"] == "llm":
+                entry["prompt_tokens"] += attributes.get("prompt_tokens", 0)
+                entry["completion_tokens"] += attributes.get("completion_tokens", 0)
+            entry["output_bytes"] += attributes.get("output_bytes", 0)
+            entry["errors"] += 1 if s["status"] == "error" else 0
+            if s["kind"] == "llm" and "prompt_eval_ms" in attributes:
+                node = prompt_eval.setdefault(attributes.get("node", s["name"]), {
+                    "calls": 0, "prompt_eval_ms": [], "prompt_eval_tokens": [], "prompt_tokens": [],
+                })
+                node["calls"] += 1
+                node["prompt_eval_ms"].append(attributes["prompt_eval_ms"])
+                node["prompt_eval_tokens"].append(attributes.get("prompt_eval_tokens", 0))
+                node["prompt_tokens"].append(attributes.get("prompt_tokens", 0))
+        summary[trace_id] = {
+            "wall_ms": round((end - start) * 1000, 3),
+            "spans": len(trace_spans),
+            "prompt_tokens": sum(e["prompt_tokens"] for e in by_name.values()),
+            "completion_tokens": sum(e["completion_tokens"] for e in by_name.values()),
+            "by_name": dict(sorted(by_name.items(), key=lambda item: -item[1]["total_ms"])),
+            "prompt_eval": prompt_eval,
+        }
+    return summary